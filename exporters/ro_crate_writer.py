@@ -0,0 +1,341 @@
+# exporters/ro_crate_writer.py
+#
+# Streaming RO-Crate (ro-crate-metadata.json) writer for REMBI microscopy metadata.
+#
+# Usage:
+#   python -m exporters.ro_crate_writer <image folder> <crate folder> [--format TIFF|CZI] [--per-scene] [--no-resume]
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import pathlib
+from urllib.parse import quote
+
+from metadata_profiles.tiff_microscopy_profile import REMBI_TIFF_MICROSCOPY_PROFILE
+from utils.extraction import SUPPORTED_EXTENSIONS, extract_batch
+
+METADATA_FILE = "ro-crate-metadata.json"
+JOURNAL_SUFFIX = ".journal"
+RO_CRATE_CONTEXT = "https://w3id.org/ro/crate/1.1/context"
+RO_CRATE_SPEC = "https://w3id.org/ro/crate/1.1"
+
+ENCODING_FORMATS = {
+    ".tif": "image/tiff",
+    ".tiff": "image/tiff",
+}
+
+# (id prefix, category, name field, property fields): hardware shared by many images
+SHARED_ENTITIES = (
+    ("microscope", "Microscope", "MicroscopeName", ("MicroscopeType",)),
+    ("objective", "Objective", "ObjectiveName", ("NA", "Magnification")),
+    ("detector", "Detector", "DetectorName", ("DetectorModel",)),
+    ("light-source", "Light Source", "LightSource", ()),
+)
+SHARED_FIELDS = {field for _, _, name, props in SHARED_ENTITIES for field in (name,) + props}
+# Fields mapped to native RO-Crate / schema.org properties of the image itself
+NATIVE_FIELDS = {"ImageName", "AcquisitionTime"}
+
+
+class ROCrateWriter:
+    """
+    Writes an RO-Crate with one File entity per image in constant memory.
+
+    Entities are appended to a journal next to the crate (one JSON entity per
+    line, flushed per image) and only assembled into ro-crate-metadata.json by
+    finish(). Instrument, objective, detector and light source entities are
+    written once and referenced by every image that shares them.
+
+    If a previous run was interrupted, the journal is picked up again: any
+    incomplete trailing image is discarded and has_image() tells which files
+    are already in the crate, so they can be skipped.
+    """
+
+    def __init__(self, crate_dir, name="IMetVi image metadata", description=None,
+                 license=None, base_dir=None, resume=True, profile=REMBI_TIFF_MICROSCOPY_PROFILE):
+        self.crate_dir = crate_dir
+        self.base_dir = os.path.abspath(base_dir or crate_dir)
+        self.name = name
+        self.description = description or "Image metadata following the REMBI recommendations, extracted with IMetVi."
+        self.license = license
+        self.profile = profile
+        self.metadata_path = os.path.join(crate_dir, METADATA_FILE)
+        self.journal_path = self.metadata_path + JOURNAL_SUFFIX
+        self.images_written = 0
+        self._written_ids = set()
+        self._shared_ids = set()
+
+        os.makedirs(crate_dir, exist_ok=True)
+        if resume and os.path.exists(self.journal_path):
+            self._recover_journal()
+        else:
+            open(self.journal_path, "w").close()
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.finish()
+        else:
+            # Keep the journal so the export can be resumed
+            self._journal.close()
+
+    def add_image(self, file_path, standardized_metadata):
+        """
+        Appends one image file (and any hardware entity not seen before) to the crate.
+
+        A record with "Scenes" (multi-scene CZI extracted per scene) also gets
+        one File entity per scene, "<file>#scene-<index>", listed in the file's
+        hasPart. The file entity is written last, after its scenes.
+        """
+        file_id = self._file_id(file_path)
+        if file_id in self._written_ids:
+            return
+        entities = []
+
+        scene_refs = []
+        for scene in standardized_metadata.get("Scenes") or []:
+            scene_id = f"{file_id}#scene-{scene['SceneIndex']}"
+            entities.append(self._image_entity(scene_id, file_path, scene, entities))
+            scene_refs.append({"@id": scene_id})
+
+        image = self._image_entity(file_id, file_path, standardized_metadata, entities)
+        if standardized_metadata.get("FileSizeBytes") is not None:
+            image["contentSize"] = str(standardized_metadata["FileSizeBytes"])
+        for algorithm, digest in (standardized_metadata.get("Checksums") or {}).items():
+            image[algorithm] = digest
+        if scene_refs:
+            image["hasPart"] = scene_refs
+        # The file is always the last line of its group, which marks the group as complete
+        entities.append(image)
+
+        self._journal.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entities))
+        self._journal.flush()
+        self._written_ids.add(file_id)
+        self.images_written += 1
+
+    def has_image(self, file_path):
+        """
+        Returns True if file_path already has its File entity in the crate.
+        """
+        return self._file_id(file_path) in self._written_ids
+
+    def finish(self):
+        """
+        Assembles ro-crate-metadata.json from the journal and removes the journal.
+        Streams the journal twice (hasPart, then entities) so memory stays flat.
+        """
+        self._journal.close()
+        tmp_path = self.metadata_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write('{\n"@context": ' + json.dumps(RO_CRATE_CONTEXT) + ',\n"@graph": [\n')
+            out.write(json.dumps({
+                "@id": METADATA_FILE,
+                "@type": "CreativeWork",
+                "conformsTo": {"@id": RO_CRATE_SPEC},
+                "about": {"@id": "./"},
+            }))
+
+            root = {
+                "@id": "./",
+                "@type": "Dataset",
+                "name": self.name,
+                "description": self.description,
+                "datePublished": datetime.date.today().isoformat(),
+            }
+            if self.license:
+                root["license"] = {"@id": self.license}
+            # Leave the closing brace off so hasPart can be streamed into it
+            out.write(",\n" + json.dumps(root)[:-1] + ', "hasPart": [')
+            first = True
+            for entity in self._iter_journal():
+                # Scenes are reached through their file's hasPart
+                if entity.get("@type") == "File" and not _is_scene_id(entity["@id"]):
+                    out.write(("" if first else ", ") + json.dumps({"@id": entity["@id"]}))
+                    first = False
+            out.write("]}")
+
+            for entity in self._iter_journal():
+                out.write(",\n" + json.dumps(entity, ensure_ascii=False))
+            out.write("\n]\n}\n")
+
+        os.replace(tmp_path, self.metadata_path)
+        os.remove(self.journal_path)
+        return self.metadata_path
+
+    # === Helpers ===
+    def _image_entity(self, entity_id, file_path, metadata, entities):
+        # Appends the image's property values and new hardware entities to entities
+        instrument_refs = []
+        for prefix, category, name_field, property_fields in SHARED_ENTITIES:
+            values = [metadata.get(f, "") for f in (name_field,) + property_fields]
+            if not any(values):
+                continue
+            digest = hashlib.sha1(json.dumps(values).encode("utf-8")).hexdigest()[:12]
+            shared_id = f"#{prefix}-{digest}"
+            instrument_refs.append({"@id": shared_id})
+            if shared_id in self._shared_ids:
+                continue
+            properties = self._property_values(shared_id + "-", property_fields, metadata)
+            entities.extend(properties)
+            entities.append({
+                "@id": shared_id,
+                "@type": "IndividualProduct",
+                "name": metadata.get(name_field) or category,
+                "category": category,
+                "additionalProperty": [{"@id": p["@id"]} for p in properties],
+            })
+            self._shared_ids.add(shared_id)
+
+        image_fields = [key for key in self.profile if key not in SHARED_FIELDS and key not in NATIVE_FIELDS]
+        properties = self._property_values(entity_id + ("-" if "#" in entity_id else "#"), image_fields, metadata)
+        entities.extend(properties)
+
+        image = {
+            "@id": entity_id,
+            "@type": "File",
+            "name": metadata.get("ImageName") or os.path.basename(file_path),
+        }
+        encoding_format = ENCODING_FORMATS.get(os.path.splitext(file_path)[1].lower())
+        if encoding_format:
+            image["encodingFormat"] = encoding_format
+        if metadata.get("AcquisitionTime"):
+            image["dateCreated"] = metadata["AcquisitionTime"]
+        if instrument_refs:
+            image["instrument"] = instrument_refs
+        image["additionalProperty"] = [{"@id": p["@id"]} for p in properties]
+        return image
+
+    def _file_id(self, file_path):
+        path = os.path.abspath(file_path)
+        try:
+            relative = os.path.relpath(path, self.base_dir)
+        except ValueError:  # different drive on Windows
+            relative = os.pardir
+        if relative.startswith(os.pardir):
+            return pathlib.Path(path).as_uri()
+        return quote(pathlib.PurePath(relative).as_posix())
+
+    def _property_values(self, id_prefix, fields, metadata):
+        properties = []
+        for key in fields:
+            value = self._field_value(key, metadata)
+            if value in ("", None, []):
+                continue
+            spec = self.profile.get(key, {})
+            entity = {
+                "@id": id_prefix + key,
+                "@type": "PropertyValue",
+                "propertyID": key,
+                "name": spec.get("label", key),
+                "value": value,
+            }
+            if spec.get("unit"):
+                entity["unitText"] = spec["unit"]
+            properties.append(entity)
+        return properties
+
+    @staticmethod
+    def _field_value(key, metadata):
+        if key != "Channels":
+            return metadata.get(key, "")
+        # CZI records carry a Channels list, TIFF records Channel_<i>_Name keys
+        names = [ch.get("Name", "") for ch in metadata.get("Channels") or [] if isinstance(ch, dict)]
+        i = 1
+        while f"Channel_{i}_Name" in metadata:
+            names.append(metadata[f"Channel_{i}_Name"])
+            i += 1
+        return [name for name in names if name]
+
+    def _iter_journal(self):
+        with open(self.journal_path, encoding="utf-8") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def _recover_journal(self):
+        # Keep everything up to the last complete image, drop a torn tail
+        valid_end = 0
+        group_shared_ids = set()
+        with open(self.journal_path, "rb") as f:
+            offset = 0
+            for line in f:
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entity = json.loads(line)
+                except ValueError:
+                    break
+                if entity.get("@type") == "IndividualProduct":
+                    group_shared_ids.add(entity["@id"])
+                elif entity.get("@type") == "File" and not _is_scene_id(entity["@id"]):
+                    self._shared_ids |= group_shared_ids
+                    group_shared_ids = set()
+                    self._written_ids.add(entity["@id"])
+                    self.images_written += 1
+                    valid_end = offset
+        with open(self.journal_path, "r+b") as f:
+            f.truncate(valid_end)
+
+
+def _is_scene_id(entity_id):
+    # File ids are percent-encoded, so a literal "#" only occurs in scene ids
+    return "#" in entity_id
+
+
+def export_folder_to_ro_crate(image_dir, crate_dir, file_format=None, resume=True, workers=None,
+                              per_scene=False, **writer_options):
+    """
+    Extracts every image in image_dir (sorted by name) and streams it into an
+    RO-Crate in crate_dir. Files already in an interrupted crate are skipped;
+    files that failed are tried again. With per_scene, multi-scene CZI files
+    get one entity per scene as well.
+
+    Returns:
+        (path of ro-crate-metadata.json, list of failure entries)
+    """
+    file_paths = sorted(
+        os.path.join(image_dir, fname) for fname in os.listdir(image_dir)
+        if os.path.splitext(fname)[1].lower() in SUPPORTED_EXTENSIONS
+    )
+    failures = []
+    writer = ROCrateWriter(crate_dir, base_dir=image_dir, resume=resume, **writer_options)
+    # Resume by identity rather than position: failed files never reach the journal
+    remaining = [path for path in file_paths if not writer.has_image(path)]
+
+    for result in extract_batch(remaining, file_format=file_format, workers=workers, checksums=("sha256",),
+                                per_scene=per_scene):
+        if result["status"] == "ok":
+            writer.add_image(result["path"], result["metadata"])
+        else:
+            failures.append(result)
+
+    return writer.finish(), failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a folder of images as an RO-Crate")
+    parser.add_argument("image_dir")
+    parser.add_argument("crate_dir")
+    parser.add_argument("--format", choices=["TIFF", "CZI"], default=None)
+    parser.add_argument("--name", default="IMetVi image metadata")
+    parser.add_argument("--license", default=None, help="License URL for the dataset")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--per-scene", action="store_true", help="Add one entity per scene of multi-scene CZI files")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of continuing an interrupted export")
+    args = parser.parse_args()
+
+    metadata_path, failures = export_folder_to_ro_crate(
+        args.image_dir, args.crate_dir, file_format=args.format, resume=not args.no_resume,
+        workers=args.workers, per_scene=args.per_scene, name=args.name, license=args.license
+    )
+    for entry in failures:
+        print(f"Failed to process {os.path.basename(entry['path'])}: {entry['failure']} ({entry['error']})")
+    print(f"RO-Crate written to {metadata_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,21 @@ import os
 import json
 import pprint
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTextEdit, QFileDialog, QMessageBox,
-    QLabel, QComboBox
+    QLabel, QComboBox, QCheckBox, QLineEdit, QListWidget, QListWidgetItem
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 # === Import TIFF and CZI parsers and standardizers ===
-from metadata_parsers.tiff_parser import parse_tiff_metadata
-from metadata_parsers.czi_parser import parse_czi_metadata
-from standardizers.tiff_microscopy_standardizer import standardize_tiff_microscopy_metadata
-from standardizers.czi_microscopy_standardizer import standardize_czi_microscopy_metadata
+from exporters.ro_crate_writer import ROCrateWriter
+from standardizers.czi_scene_standardizer import expand_scene_records
+from standardizers.profile_standardizer import available_applications
+from utils.extraction import extract_batch, extract_metadata, failure_entry
+from utils.fixity import DEFAULT_ALGORITHMS, write_bagit_manifests
+from utils.search_index import SearchIndex
 from utils.serialization import make_json_serializable
 
 
@@ -39,10 +42,26 @@ class MetadataViewer(QWidget):
 
         self.app_label = QLabel("Select Application:")
         self.app_dropdown = QComboBox()
-        self.app_dropdown.addItems(["Microscopy"])
+        self.app_dropdown.addItems(available_applications())
         top_layout.addWidget(self.app_label)
         top_layout.addWidget(self.app_dropdown)
 
+        self.pixel_stats_checkbox = QCheckBox("Compute Pixel Statistics")
+        self.pixel_stats_checkbox.setToolTip("Per-channel min/max/mean, histogram and saturation (reads pixel data)")
+        top_layout.addWidget(self.pixel_stats_checkbox)
+
+        self.isolate_checkbox = QCheckBox("Isolate Files")
+        self.isolate_checkbox.setToolTip("Process each file of a folder in a supervised worker with time and memory limits")
+        top_layout.addWidget(self.isolate_checkbox)
+
+        self.checksums_checkbox = QCheckBox("Compute Checksums")
+        self.checksums_checkbox.setToolTip("SHA-256 and MD5 fixity digests, computed while the metadata is extracted")
+        top_layout.addWidget(self.checksums_checkbox)
+
+        self.scenes_checkbox = QCheckBox("Split CZI Scenes")
+        self.scenes_checkbox.setToolTip("One record per scene / position of multi-scene CZI files")
+        top_layout.addWidget(self.scenes_checkbox)
+
         self.file_selector_label = QLabel("Select File:")
         self.file_selector_dropdown = QComboBox()
         self.file_selector_dropdown.currentIndexChanged.connect(self.select_loaded_file)
@@ -74,8 +93,40 @@ class MetadataViewer(QWidget):
         self.export_csv_btn.setEnabled(False)
         button_layout.addWidget(self.export_csv_btn)
 
+        self.export_manifest_btn = QPushButton("Export Checksum Manifest")
+        self.export_manifest_btn.clicked.connect(self.export_checksum_manifest)
+        self.export_manifest_btn.setEnabled(False)
+        button_layout.addWidget(self.export_manifest_btn)
+
+        self.export_crate_btn = QPushButton("Export as RO-Crate")
+        self.export_crate_btn.clicked.connect(self.export_as_ro_crate)
+        self.export_crate_btn.setEnabled(False)
+        button_layout.addWidget(self.export_crate_btn)
+
         layout.addLayout(button_layout)
 
+        # === Raw metadata search ===
+        search_layout = QVBoxLayout()
+
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search raw metadata of indexed files (e.g. DefiniteFocus, Axiocam 712)")
+        self.search_box.textChanged.connect(self.schedule_search)
+        search_layout.addWidget(self.search_box)
+
+        self.search_results = QListWidget()
+        self.search_results.setMaximumHeight(150)
+        self.search_results.itemClicked.connect(self.open_search_result)
+        self.search_results.hide()
+        search_layout.addWidget(self.search_results)
+
+        # Search runs once typing pauses instead of on every keystroke
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.run_search)
+
+        layout.addLayout(search_layout)
+
         # === Metadata display panels ===
         panel_layout = QHBoxLayout()
 
@@ -97,7 +148,13 @@ class MetadataViewer(QWidget):
         self.last_standardized_metadata = None
         self.last_file_path = None
         self.all_standardized_metadata = []
+        self.all_file_paths = []
+        self.file_records = []
         self.loaded_files = []
+        self.failed_files = []
+        self.index_failures = []
+        self.search_index = SearchIndex.load()
+        self.search_index_dirty = False
 
     # === File and Folder Loading ===
     def load_file(self):
@@ -110,28 +167,39 @@ class MetadataViewer(QWidget):
         if folder_path:
             self.loaded_files = []
             self.all_standardized_metadata = []
+            self.all_file_paths = []
+            self.file_records = []
             self.file_selector_dropdown.clear()
+            self.failed_files = []
+            self.index_failures = []
 
             selected_format = self.format_dropdown.currentText()
+            if selected_format not in ("TIFF", "CZI"):
+                return
 
-            for fname in os.listdir(folder_path):
+            file_paths = []
+            for fname in sorted(os.listdir(folder_path)):
                 full_path = os.path.join(folder_path, fname)
                 if os.path.isfile(full_path) and fname.lower().endswith((".tif", ".tiff", ".czi")):
-                    try:
-                        if selected_format == "TIFF":
-                            text_report, raw_metadata = parse_tiff_metadata(full_path, application=self.app_dropdown.currentText())
-                            standardized_metadata = standardize_tiff_microscopy_metadata(raw_metadata)
-                        elif selected_format == "CZI":
-                            text_report, raw_metadata = parse_czi_metadata(full_path, application=self.app_dropdown.currentText())
-                            standardized_metadata = standardize_czi_microscopy_metadata(raw_metadata)
-                        else:
-                            continue
+                    file_paths.append(full_path)
 
-                        self.loaded_files.append((full_path, text_report, standardized_metadata))
-                        self.all_standardized_metadata.append(standardized_metadata)
-                        self.file_selector_dropdown.addItem(os.path.basename(full_path))
-                    except Exception as e:
-                        print(f"Failed to process {fname}: {e}")
+            if self.isolate_checkbox.isChecked():
+                self.load_files_isolated(file_paths, selected_format)
+            else:
+                # One statistics pool for the whole folder; its processes start only if a large file needs them
+                stats_pool = ProcessPoolExecutor(max_workers=os.cpu_count()) if self.pixel_stats_checkbox.isChecked() else None
+                try:
+                    for full_path in file_paths:
+                        try:
+                            text_report, raw_metadata, standardized_metadata = self.extract(full_path, selected_format, stats_pool)
+                            self.add_loaded_file(full_path, text_report, standardized_metadata)
+                            self.index_file(full_path, raw_metadata)
+                        except Exception as e:
+                            self.failed_files.append(failure_entry(full_path, e))
+                finally:
+                    if stats_pool is not None:
+                        stats_pool.shutdown()
+            self.save_search_index()
 
             if self.loaded_files:
                 self.file_selector_label.show()
@@ -141,6 +209,41 @@ class MetadataViewer(QWidget):
 
             self.export_json_btn.setEnabled(bool(self.loaded_files))
             self.export_csv_btn.setEnabled(bool(self.loaded_files))
+            self.export_crate_btn.setEnabled(bool(self.loaded_files))
+            self.export_manifest_btn.setEnabled(self.has_checksums())
+
+            self.report_failures()
+
+    def load_files_isolated(self, file_paths, selected_format):
+        # Each file runs in a supervised worker process with time and memory limits
+        results = [None] * len(file_paths)
+        for result in extract_batch(
+            file_paths,
+            file_format=selected_format,
+            application=self.app_dropdown.currentText(),
+            pixel_statistics=self.pixel_stats_checkbox.isChecked(),
+            include_raw=True,
+            include_report=True,
+            checksums=self.selected_checksums(),
+            per_scene=self.scenes_checkbox.isChecked()
+        ):
+            results[result["index"]] = result
+
+        for result in results:
+            if result["status"] == "ok":
+                self.add_loaded_file(result["path"], result["text_report"], result["metadata"])
+                self.index_file(result["path"], result["raw_metadata"])
+            else:
+                self.failed_files.append(result)
+
+    def add_loaded_file(self, file_path, text_report, standardized_metadata):
+        # Multi-scene CZI files contribute a whole-file entry and one entry per scene
+        self.file_records.append((file_path, standardized_metadata))
+        for record in expand_scene_records(standardized_metadata):
+            self.loaded_files.append((file_path, text_report, record))
+            self.all_standardized_metadata.append(record)
+            self.all_file_paths.append(file_path)
+            self.file_selector_dropdown.addItem(record.get("ImageName") or os.path.basename(file_path))
 
     def select_loaded_file(self, index):
         if 0 <= index < len(self.loaded_files):
@@ -152,67 +255,169 @@ class MetadataViewer(QWidget):
             self.recommended_metadata_display.append(f"File: {os.path.basename(file_path)}\n")
 
             self.raw_metadata_display.append(text_report)
+            self.append_standardized_metadata(standardized_metadata)
+
+    def report_failures(self):
+        messages = []
+        if self.failed_files:
+            details = "\n".join(
+                f"{os.path.basename(entry['path'])}: {entry['failure']} ({entry['error']})"
+                for entry in self.failed_files
+            )
+            messages.append(f"{len(self.failed_files)} file(s) could not be processed:\n\n{details}")
+        if self.index_failures:
+            details = "\n".join(
+                f"{os.path.basename(entry['path'])}: {entry['error']}" for entry in self.index_failures
+            )
+            messages.append(f"{len(self.index_failures)} file(s) were loaded but could not be added to the search index:\n\n{details}")
+        if messages:
+            QMessageBox.warning(self, "Some files failed", "\n\n".join(messages))
+
+    # === Raw Metadata Search ===
+    def index_file(self, file_path, raw_metadata):
+        # A file that cannot be indexed is still loaded; it is reported and just not searchable
+        try:
+            if self.search_index.add_file(file_path, raw_metadata):
+                self.search_index_dirty = True
+        except Exception as e:
+            self.index_failures.append(failure_entry(file_path, e))
+
+    def save_search_index(self):
+        # Saved after a folder load and on exit, not after every single file
+        if not self.search_index_dirty:
+            return
+        try:
+            self.search_index.save()
+            self.search_index_dirty = False
+        except OSError as e:
+            QMessageBox.warning(self, "Search index not saved", f"Could not save the search index: {e}")
+
+    def closeEvent(self, event):
+        self.save_search_index()
+        super().closeEvent(event)
+
+    def schedule_search(self):
+        self.search_timer.start()
+
+    def run_search(self):
+        self.search_results.clear()
+        query = self.search_box.text()
+        if not query.strip():
+            self.search_results.hide()
+            return
 
-            for key, value in standardized_metadata.items():
-                if key == "Channels" and isinstance(value, list):
-                    self.recommended_metadata_display.append("Channels:")
-                    for idx, channel_info in enumerate(value, 1):
-                        name = channel_info.get('Name', '')
-                        exc = channel_info.get('ExcitationWavelength', 'nm')
-                        em = channel_info.get('EmissionWavelength', 'nm')
-                        exp = channel_info.get('ExposureTime_sec', 'sec')
-                        self.recommended_metadata_display.append(f"  - Channel {idx}: {name} (Exc: {exc} nm, Em: {em} nm, Exp: {exp} sec)")
-                else:
-                    self.recommended_metadata_display.append(f"{key}: {value}")
+        results = self.search_index.search(query, limit=200)
+        for match in results:
+            key_paths = match["key_paths"]
+            shown = ", ".join(key_paths[:3]) + (f" (+{len(key_paths) - 3} more)" if len(key_paths) > 3 else "")
+            item = QListWidgetItem(f"{os.path.basename(match['path'])}  —  {shown}")
+            item.setToolTip(match["path"] + "\n" + "\n".join(key_paths))
+            item.setData(Qt.UserRole, match["path"])
+            self.search_results.addItem(item)
+        if not results:
+            self.search_results.addItem("No matches")
+        self.search_results.show()
+
+    def open_search_result(self, item):
+        file_path = item.data(Qt.UserRole)
+        if not file_path:
+            return
+        # Jump to the file if it is part of the loaded folder, otherwise load it on its own
+        for index, (loaded_path, _, _) in enumerate(self.loaded_files):
+            if loaded_path == file_path:
+                self.file_selector_dropdown.setCurrentIndex(index)
+                return
+        if os.path.isfile(file_path):
+            self.format_dropdown.setCurrentText("CZI" if file_path.lower().endswith(".czi") else "TIFF")
+            self.display_metadata(file_path, single_file=True)
 
     # === Metadata Display ===
+    def append_standardized_metadata(self, standardized_metadata):
+        for key, value in standardized_metadata.items():
+            if key == "Channels" and isinstance(value, list):
+                self.recommended_metadata_display.append("Channels:")
+                for idx, channel_info in enumerate(value, 1):
+                    name = channel_info.get('Name', '')
+                    exc = channel_info.get('ExcitationWavelength', 'nm')
+                    em = channel_info.get('EmissionWavelength', 'nm')
+                    exp = channel_info.get('ExposureTime_sec', 'sec')
+                    self.recommended_metadata_display.append(f"  - Channel {idx}: {name} (Exc: {exc} nm, Em: {em} nm, Exp: {exp} sec)")
+            elif key == "ChannelStatistics" and isinstance(value, list):
+                self.recommended_metadata_display.append("Channel Statistics:")
+                for stats in value:
+                    saturated = stats.get('SaturatedFraction')
+                    saturated_text = f"{saturated:.4%}" if saturated is not None else "n/a"
+                    self.recommended_metadata_display.append(
+                        f"  - Channel {stats['Channel'] + 1}: min {stats['Min']}, max {stats['Max']}, "
+                        f"mean {stats['Mean']:.2f}, saturated {saturated_text}"
+                    )
+            elif key == "Scenes" and isinstance(value, list):
+                self.recommended_metadata_display.append(f"Scenes: {len(value)}")
+                for scene in value:
+                    self.recommended_metadata_display.append(
+                        f"  - Scene {int(scene['SceneIndex']) + 1} {scene['SceneName']}: "
+                        f"{scene['DimensionX']} x {scene['DimensionY']} px at ({scene['StartX']}, {scene['StartY']}), "
+                        f"C={scene['SizeC']} Z={scene['SizeZ']} T={scene['SizeT']} tiles={scene['SizeM']}"
+                    )
+            else:
+                self.recommended_metadata_display.append(f"{key}: {value}")
+
+    def extract(self, file_path, selected_format, stats_pool=None):
+        return extract_metadata(
+            file_path,
+            file_format=selected_format,
+            application=self.app_dropdown.currentText(),
+            pixel_statistics=self.pixel_stats_checkbox.isChecked(),
+            pixel_statistics_workers=os.cpu_count(),
+            pixel_statistics_executor=stats_pool,
+            checksums=self.selected_checksums(),
+            per_scene=self.scenes_checkbox.isChecked()
+        )
+
+    def selected_checksums(self):
+        return DEFAULT_ALGORITHMS if self.checksums_checkbox.isChecked() else None
+
+    def has_checksums(self):
+        return any("Checksums" in metadata for metadata in self.all_standardized_metadata)
+
     def display_metadata(self, file_path, single_file=False):
         selected_format = self.format_dropdown.currentText()
-        selected_app = self.app_dropdown.currentText()
 
         self.raw_metadata_display.clear()
         self.recommended_metadata_display.clear()
         self.last_standardized_metadata = None
         self.last_file_path = file_path
+        self.index_failures = []
 
         self.raw_metadata_display.append(f"File: {os.path.basename(file_path)}\n")
         self.recommended_metadata_display.append(f"File: {os.path.basename(file_path)}\n")
 
         try:
-            if selected_format == "TIFF":
-                text_report, raw_metadata = parse_tiff_metadata(file_path, application=selected_app)
-                self.last_standardized_metadata = standardize_tiff_microscopy_metadata(raw_metadata)
-            elif selected_format == "CZI":
-                text_report, raw_metadata = parse_czi_metadata(file_path, application=selected_app)
-                self.last_standardized_metadata = standardize_czi_microscopy_metadata(raw_metadata)
-            else:
+            if selected_format not in ("TIFF", "CZI"):
                 self.raw_metadata_display.append("Unsupported file format.")
                 self.recommended_metadata_display.append("No recommended metadata.")
                 return
 
+            text_report, raw_metadata, self.last_standardized_metadata = self.extract(file_path, selected_format)
             self.raw_metadata_display.append(text_report)
-
-            for key, value in self.last_standardized_metadata.items():
-                if key == "Channels" and isinstance(value, list):
-                    self.recommended_metadata_display.append("Channels:")
-                    for idx, channel_info in enumerate(value, 1):
-                        name = channel_info.get('Name', '')
-                        exc = channel_info.get('ExcitationWavelength', 'nm')
-                        em = channel_info.get('EmissionWavelength', 'nm')
-                        exp = channel_info.get('ExposureTime_sec', 'sec')
-                        self.recommended_metadata_display.append(f"  - Channel {idx}: {name} (Exc: {exc} nm, Em: {em} nm, Exp: {exp} sec)")
-                else:
-                    self.recommended_metadata_display.append(f"{key}: {value}")
+            self.append_standardized_metadata(self.last_standardized_metadata)
+            self.index_file(file_path, raw_metadata)
+            for entry in self.index_failures:
+                self.raw_metadata_display.append(f"\nNot added to the search index: {entry['error']}")
 
         except Exception as e:
             self.raw_metadata_display.append(f"Error: {str(e)}")
             self.recommended_metadata_display.append("Metadata extraction failed.")
 
         if single_file and self.last_standardized_metadata:
-            self.all_standardized_metadata = [self.last_standardized_metadata]
+            self.all_standardized_metadata = expand_scene_records(self.last_standardized_metadata)
+            self.all_file_paths = [file_path] * len(self.all_standardized_metadata)
+            self.file_records = [(file_path, self.last_standardized_metadata)]
 
         self.export_json_btn.setEnabled(bool(self.all_standardized_metadata))
         self.export_csv_btn.setEnabled(bool(self.all_standardized_metadata))
+        self.export_crate_btn.setEnabled(bool(self.all_standardized_metadata))
+        self.export_manifest_btn.setEnabled(self.has_checksums())
 
     # === Export Functions ===
     def export_as_json(self):
@@ -242,6 +447,9 @@ class MetadataViewer(QWidget):
                             for idx, entry in enumerate(val):
                                 for subkey, subval in entry.items():
                                     flat[f"{key}.{idx}.{subkey}"] = subval
+                        elif isinstance(val, dict):
+                            for subkey, subval in val.items():
+                                flat[f"{key}.{subkey}"] = subval
                         else:
                             flat[key] = val
                     flat_list.append(flat)
@@ -256,6 +464,38 @@ class MetadataViewer(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to save CSV: {str(e)}")
 
+    def export_checksum_manifest(self):
+        if not self.has_checksums():
+            return
+        output_dir = QFileDialog.getExistingDirectory(self, "Select Folder for Manifests")
+        if output_dir:
+            try:
+                file_checksums = [
+                    (file_path, metadata.get("Checksums"))
+                    for file_path, metadata in zip(self.all_file_paths, self.all_standardized_metadata)
+                ]
+                manifest_paths = write_bagit_manifests(file_checksums, output_dir)
+                names = ", ".join(os.path.basename(p) for p in manifest_paths)
+                QMessageBox.information(self, "Success", f"Checksum manifests saved: {names}")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save manifests: {str(e)}")
+
+    def export_as_ro_crate(self):
+        if not self.all_standardized_metadata:
+            return
+        crate_dir = QFileDialog.getExistingDirectory(self, "Select RO-Crate Folder")
+        if crate_dir:
+            try:
+                base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p in self.all_file_paths])
+                writer = ROCrateWriter(crate_dir, base_dir=base_dir, resume=False)
+                # Whole-file records: the writer adds the scenes of multi-scene files itself
+                for file_path, metadata in self.file_records:
+                    writer.add_image(file_path, make_json_serializable(metadata))
+                writer.finish()
+                QMessageBox.information(self, "Success", "RO-Crate metadata saved successfully.")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to save RO-Crate: {str(e)}")
+
 
 def main():
     app = QApplication(sys.argv)
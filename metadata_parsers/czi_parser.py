@@ -43,7 +43,7 @@ def parse_czi_metadata(file_path, application="Microscopy"):
     # === Dimensions ===
     extracted_metadata["DimensionX"] = root.findtext(".//SizeX", default="")
     extracted_metadata["DimensionY"] = root.findtext(".//SizeY", default="")
-    extracted_metadata["SizeZ"] = root.findtext(".//SizeB", default="")  # SizeB → Z slices
+    extracted_metadata["SizeZ"] = root.findtext(".//SizeZ", default="")  # SizeB is the block index, not Z
     extracted_metadata["SizeT"] = root.findtext(".//SizeT", default="")  # SizeT if available
 
     # === Pixel Sizes ===
@@ -118,6 +118,9 @@ def parse_czi_metadata(file_path, application="Microscopy"):
 
     extracted_metadata["Channels"] = channels
 
+    # Keep the full XML for full-text search over everything ZEN recorded
+    extracted_metadata["MetadataXML"] = metadata_xml
+
     # Return full report
     text_report = generate_text_summary(file_path, extracted_metadata)
     return text_report, extracted_metadata
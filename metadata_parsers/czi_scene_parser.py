@@ -0,0 +1,127 @@
+# metadata_parsers/czi_scene_parser.py
+
+import czifile
+import xml.etree.ElementTree as ET
+
+# Dimensions whose extent is reported per scene as Size<dim>
+COUNTED_DIMENSIONS = ("C", "Z", "T", "M")
+
+
+def parse_czi_scenes(file_path):
+    """
+    Extracts per-scene extents, positions and dimension sizes from a CZI file.
+
+    Only the subblock directory and the XML metadata segment are read, never
+    pixel subblocks, so the cost grows with the number of directory entries and
+    not with the image size.
+
+    Returns:
+        A list of scene dictionaries ordered by scene index.
+    """
+    with czifile.CziFile(file_path) as czi:
+        scenes = scan_subblock_directory(czi.subblock_directory)
+        scene_info = _scene_metadata(czi.metadata())
+
+    for scene in scenes:
+        info = scene_info.get(scene["SceneIndex"], {})
+        scene["SceneName"] = info.get("Name", "")
+        scene["WellName"] = info.get("ArrayName", "")
+        scene["StageCenterX"], scene["StageCenterY"] = _split_pair(info.get("CenterPosition", ""))
+        scene["StageContourWidth"], scene["StageContourHeight"] = _split_pair(info.get("ContourSize", ""))
+    return scenes
+
+
+def scan_subblock_directory(directory_entries):
+    """
+    Aggregates subblock directory entries into one extent record per scene.
+
+    Pixel positions (StartX/StartY) are relative to the top-left corner of the
+    whole image. Pyramid (downscaled) subblocks are ignored.
+    """
+    scenes = {}
+    for entry in directory_entries:
+        if entry.pyramid_type:
+            continue
+
+        scene_index = 0
+        x = y = width = height = 0
+        dims = {}
+        for dim in entry.dimension_entries:
+            name = dim.dimension
+            if name == "S":
+                scene_index = dim.start
+            elif name == "X":
+                x, width = dim.start, dim.size
+            elif name == "Y":
+                y, height = dim.start, dim.size
+            elif name in COUNTED_DIMENSIONS:
+                dims[name] = (dim.start, dim.start + max(dim.size, 1) - 1)
+
+        scene = scenes.get(scene_index)
+        if scene is None:
+            scene = scenes[scene_index] = {
+                "x_min": x, "y_min": y, "x_max": x + width, "y_max": y + height,
+                "ranges": {}, "subblocks": 0,
+            }
+        else:
+            scene["x_min"] = min(scene["x_min"], x)
+            scene["y_min"] = min(scene["y_min"], y)
+            scene["x_max"] = max(scene["x_max"], x + width)
+            scene["y_max"] = max(scene["y_max"], y + height)
+        scene["subblocks"] += 1
+
+        ranges = scene["ranges"]
+        for name, (low, high) in dims.items():
+            current = ranges.get(name)
+            ranges[name] = (low, high) if current is None else (min(current[0], low), max(current[1], high))
+
+    if not scenes:
+        return []
+    origin_x = min(scene["x_min"] for scene in scenes.values())
+    origin_y = min(scene["y_min"] for scene in scenes.values())
+
+    records = []
+    for scene_index in sorted(scenes):
+        scene = scenes[scene_index]
+        record = {
+            "SceneIndex": scene_index,
+            "StartX": scene["x_min"] - origin_x,
+            "StartY": scene["y_min"] - origin_y,
+            "DimensionX": scene["x_max"] - scene["x_min"],
+            "DimensionY": scene["y_max"] - scene["y_min"],
+        }
+        for name in COUNTED_DIMENSIONS:
+            low_high = scene["ranges"].get(name)
+            record[f"Size{name}"] = low_high[1] - low_high[0] + 1 if low_high else 1
+        record["SubblockCount"] = scene["subblocks"]
+        records.append(record)
+    return records
+
+
+def _scene_metadata(metadata_xml):
+    """
+    Returns {scene index: {"Name", "ArrayName", "CenterPosition", "ContourSize"}}
+    from Information/Image/Dimensions/S/Scenes.
+    """
+    info = {}
+    if not metadata_xml:
+        return info
+    root = ET.fromstring(metadata_xml)
+    for scene_node in root.findall(".//Information/Image/Dimensions/S/Scenes/Scene"):
+        try:
+            index = int(scene_node.attrib.get("Index", len(info)))
+        except ValueError:
+            continue
+        info[index] = {
+            "Name": scene_node.attrib.get("Name", ""),
+            "ArrayName": scene_node.findtext("ArrayName", default=""),
+            "CenterPosition": scene_node.findtext("CenterPosition", default=""),
+            "ContourSize": scene_node.findtext("ContourSize", default=""),
+        }
+    return info
+
+
+def _split_pair(text):
+    # "x,y" as written by ZEN, in stage units (microns)
+    parts = [p.strip() for p in text.split(",")] if text else []
+    return (parts[0], parts[1]) if len(parts) == 2 else ("", "")
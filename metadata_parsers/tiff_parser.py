@@ -3,10 +3,13 @@
 import tifffile
 import os
 
-def parse_tiff_metadata(file_path, application=None):
+def parse_tiff_metadata(file_path, application=None, strict=False):
     """
     Extracts all TIFF tags and additional metadata for microscopy images.
 
+    A file that cannot be read is reported in the text report, or with strict
+    the error is raised so batch extraction can record it as a failure.
+
     Returns:
         - text_report: A string report of raw metadata, line by line.
         - raw_metadata: A dictionary with metadata key-value pairs.
@@ -61,6 +64,8 @@ def parse_tiff_metadata(file_path, application=None):
                     text_lines.append("SoftwareHint: ImageJ-based")
 
     except Exception as e:
+        if strict:
+            raise
         text_lines.append(f"Failed to read TIFF file: {str(e)}")
 
     return "\n".join(text_lines), raw_metadata
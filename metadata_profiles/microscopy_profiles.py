@@ -0,0 +1,114 @@
+# metadata_profiles/microscopy_profiles.py
+#
+# Declarative standardization profiles.
+#
+# Each profile lists the output fields in order. A field names its source paths
+# in fallback order (the first value that is not None / "" wins), an optional
+# conversion and an optional type. Sources are either top-level keys of the parser output
+# or, prefixed with "text:", keys of the Zeiss "key = value" text blocks
+# embedded in the file (e.g. the TIFF ImageDescription / IJMetadata Info).
+# Indexed channel keys use "{i}" for the 1-based channel number.
+#
+# Conversions: "basename", "inverse_rational" (TIFF resolution -> pixel size),
+# "ns_to_s". Types: "str" (default), "nonzero" (like "str", but 0 / empty
+# values are skipped), "count" (integer, empty when 0) and "raw" (the first
+# present source as stored, not converted to a string). A profile may set
+# "default_type" for all of its fields.
+#
+# Profiles are compiled once by standardizers/profile_standardizer.py; adding
+# an application or format only requires a new entry in STANDARDIZATION_PROFILES.
+
+TIFF_MICROSCOPY_PROFILE = {
+    "application": "Microscopy",
+    "format": "TIFF",
+    # Raw keys holding "key = value" text (str, or dict of str)
+    "text_sources": ["ImageDescription", "IJMetadata"],
+    "fields": [
+        {"key": "ImageName", "sources": ["FilePath"], "convert": "basename"},
+        {"key": "AcquisitionTime", "sources": ["text:Information|Image|T|StartTime"]},
+        {"key": "DimensionX", "sources": ["ImageWidth"], "type": "nonzero"},
+        {"key": "DimensionY", "sources": ["ImageLength"], "type": "nonzero"},
+        {"key": "SizeZ", "sources": ["text:SizeZ"]},
+        {"key": "SizeT", "sources": ["text:SizeT"]},
+        {"key": "DefaultUnitFormat", "sources": ["text:unit"]},
+        {"key": "ContourType", "sources": ["text:Experiment|AcquisitionBlock|RegionsSetup|SampleHolder|AllowedScanArea|ContourType"]},
+        {"key": "NumChannels", "sources": ["text:channels"], "type": "count"},
+        {"key": "PixelSizeX", "sources": ["XResolution"], "convert": "inverse_rational"},
+        {"key": "PixelSizeY", "sources": ["YResolution"], "convert": "inverse_rational"},
+        {"key": "PixelSizeZ", "sources": []},
+        {"key": "BitDepth", "sources": ["BitsPerSample"], "type": "nonzero"},
+        {"key": "ObjectiveName", "sources": [
+            "text:Scaling|AutoScaling|ObjectiveName",
+            "text:Information|Instrument|Objective|Name",
+            "text:Information|Instrument|Objective|Manufacturer|Model",
+        ]},
+        {"key": "NA", "sources": ["text:Information|Instrument|Objective|LensNA"]},
+        {"key": "Magnification", "sources": [
+            "text:Information|Image|Magnification",
+            "text:Scaling|AutoScaling|OptovarMagnification",
+        ]},
+        {"key": "MicroscopeName", "sources": ["text:Information|Instrument|Microscope|Name"]},
+        {"key": "MicroscopeType", "sources": ["text:Information|Instrument|Microscope|Type"]},
+        {"key": "DetectorName", "sources": ["text:Information|Instrument|Detector|Name"]},
+        {"key": "DetectorModel", "sources": ["text:Information|Instrument|Detector|Manufacturer|Model"]},
+        {"key": "LightSource", "sources": ["text:Information|Instrument|LightSource|Name #1"]},
+    ],
+    "channels": {
+        # Channel_<i>_<key> entries appended after the fields, for channels 1..NumChannels
+        "layout": "flat",
+        "count_field": "NumChannels",
+        "required": "Name",
+        "fields": [
+            {"key": "Name", "sources": ["text:Experiment|AcquisitionBlock|MultiTrackSetup|Track|Channel|FluorescenceDye|ShortName #{i}"]},
+            {"key": "Exposure", "sources": ["text:Information|Image|Channel|ExposureTime #{i}"], "convert": "ns_to_s"},
+        ],
+    },
+}
+
+CZI_MICROSCOPY_PROFILE = {
+    "application": "Microscopy",
+    "format": "CZI",
+    # Parser values are passed through unchanged (e.g. a missing AcquisitionTime stays None)
+    "default_type": "raw",
+    "text_sources": [],
+    "fields": [
+        {"key": "ImageName", "sources": ["FilePath"], "convert": "basename"},
+        {"key": "AcquisitionTime", "sources": ["AcquisitionTime"]},
+        {"key": "DimensionX", "sources": ["DimensionX"]},
+        {"key": "DimensionY", "sources": ["DimensionY"]},
+        {"key": "SizeZ", "sources": ["SizeZ"]},
+        {"key": "SizeT", "sources": ["SizeT"]},
+        {"key": "DefaultUnitFormat", "sources": [], "default": "microns"},
+        {"key": "ContourType", "sources": ["ContourType"]},
+        {"key": "NumChannels", "derived": "channel_count"},
+        {"key": "PixelSizeX", "sources": ["PixelSizeX"]},
+        {"key": "PixelSizeY", "sources": ["PixelSizeY"]},
+        {"key": "PixelSizeZ", "sources": ["PixelSizeZ"]},
+        {"key": "BitDepth", "sources": ["BitDepth"]},
+        {"key": "ObjectiveName", "sources": ["ObjectiveName"]},
+        {"key": "NA", "sources": ["NA"]},
+        {"key": "Magnification", "sources": ["Magnification"]},
+        {"key": "Channels", "derived": "channels"},
+        {"key": "MicroscopeName", "sources": ["MicroscopeName"]},
+        {"key": "MicroscopeType", "sources": ["MicroscopeType"]},
+        {"key": "DetectorName", "sources": ["DetectorName"]},
+        {"key": "DetectorModel", "sources": ["DetectorModel"]},
+        {"key": "LightSource", "sources": ["LightSource"]},
+    ],
+    "channels": {
+        # One dictionary per entry of the parser's channel list, output under "Channels"
+        "layout": "list",
+        "source": "Channels",
+        "fields": [
+            {"key": "Name", "sources": ["Name"]},
+            {"key": "ExcitationWavelength", "sources": ["ExcitationWavelength"]},
+            {"key": "EmissionWavelength", "sources": ["EmissionWavelength"]},
+            {"key": "ExposureTime_sec", "sources": ["ExposureTime_sec"]},
+        ],
+    },
+}
+
+STANDARDIZATION_PROFILES = {
+    (profile["application"], profile["format"]): profile
+    for profile in (TIFF_MICROSCOPY_PROFILE, CZI_MICROSCOPY_PROFILE)
+}
@@ -0,0 +1,227 @@
+# service/metadata_service.py
+#
+# Long-running local metadata extraction service.
+#
+# Usage:
+#   python -m service.metadata_service --port 8765 --workers 4
+#
+# Endpoints (JSON over HTTP, bound to localhost by default):
+#   GET  /health   -> {"status": "ok", "workers": 4, "uptime_sec": 12.3}
+#   GET  /metrics  -> request/file counters, latency and throughput
+#   POST /extract  -> body {"paths": [...], "format": null, "application": "Microscopy",
+#                           "pixel_statistics": false, "include_raw": false,
+#                           "checksums": ["sha256", "md5"], "per_scene": false}
+#                     response: NDJSON stream, one line per file in completion order
+#
+# Every file runs under the --timeout-sec / --max-rss-mb limits; a worker that
+# exceeds them is killed and replaced and the file is reported with
+# "status": "error" and "failure": "timeout" | "oom" | "crashed".
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.extraction import DEFAULT_MAX_RSS_MB, DEFAULT_TIMEOUT_SEC, extract_batch
+from utils.fixity import SUPPORTED_ALGORITHMS
+from utils.supervised_pool import SupervisedPool
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Completed files remembered for the sliding-window throughput figure
+THROUGHPUT_WINDOW_SEC = 60.0
+
+
+def _warm_up():
+    """Runs once per worker so the first real request does not pay for process start-up."""
+    return os.getpid()
+
+
+class ServiceMetrics:
+    """
+    Thread-safe counters exposed by GET /metrics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.in_flight = 0
+        self.files_ok = 0
+        self.files_failed = 0
+        self.total_extraction_sec = 0.0
+        self._completed = deque()
+
+    def request_started(self, n_files):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += n_files
+
+    def file_finished(self, result):
+        now = time.time()
+        with self._lock:
+            self.in_flight -= 1
+            if result.get("status") == "ok":
+                self.files_ok += 1
+            else:
+                self.files_failed += 1
+            self.total_extraction_sec += result.get("elapsed_sec", 0.0)
+            self._completed.append(now)
+            self._trim(now)
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            self._trim(now)
+            uptime = now - self.started
+            files_done = self.files_ok + self.files_failed
+            return {
+                "uptime_sec": uptime,
+                "requests": self.requests,
+                "files_in_flight": self.in_flight,
+                "files_ok": self.files_ok,
+                "files_failed": self.files_failed,
+                "mean_extraction_sec": self.total_extraction_sec / files_done if files_done else None,
+                "throughput_files_per_sec": files_done / uptime if uptime else 0.0,
+                "recent_throughput_files_per_sec": len(self._completed) / min(uptime, THROUGHPUT_WINDOW_SEC) if uptime else 0.0,
+            }
+
+    def _trim(self, now):
+        while self._completed and now - self._completed[0] > THROUGHPUT_WINDOW_SEC:
+            self._completed.popleft()
+
+
+class MetadataRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "IMetViService/1.0"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {
+                "status": "ok",
+                "workers": self.server.workers,
+                "uptime_sec": time.time() - self.server.metrics.started,
+            })
+        elif self.path == "/metrics":
+            snapshot = self.server.metrics.snapshot()
+            snapshot["workers"] = self.server.workers
+            snapshot["workers_recycled"] = self.server.pool.recycled
+            self._send_json(200, snapshot)
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/extract":
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            paths = request["paths"]
+            if not isinstance(paths, list) or not all(isinstance(p, str) for p in paths):
+                raise ValueError("'paths' must be a list of strings")
+            for algorithm in request.get("checksums") or []:
+                if algorithm not in SUPPORTED_ALGORITHMS:
+                    raise ValueError(f"unknown checksum algorithm {algorithm!r}")
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": f"Invalid request: {e}"})
+            return
+
+        metrics = self.server.metrics
+        metrics.request_started(len(paths))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        results = extract_batch(
+            paths,
+            file_format=request.get("format"),
+            application=request.get("application", "Microscopy"),
+            pixel_statistics=bool(request.get("pixel_statistics", False)),
+            include_raw=bool(request.get("include_raw", False)),
+            checksums=request.get("checksums"),
+            per_scene=bool(request.get("per_scene", False)),
+            pool=self.server.pool
+        )
+        client_connected = True
+        for result in results:
+            metrics.file_finished(result)
+            if client_connected:
+                client_connected = self._write_chunk(json.dumps(result) + "\n")
+        if client_connected:
+            self._write_chunk("")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        try:
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+            return True
+        except (BrokenPipeError, ConnectionResetError):
+            return False
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MetadataService(ThreadingHTTPServer):
+    """
+    HTTP server owning a warm, supervised pool of extraction worker processes.
+    """
+    daemon_threads = True
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, verbose=False,
+                 timeout_sec=DEFAULT_TIMEOUT_SEC, max_rss_mb=DEFAULT_MAX_RSS_MB):
+        super().__init__((host, port), MetadataRequestHandler)
+        self.workers = workers or os.cpu_count() or 1
+        self.verbose = verbose
+        self.metrics = ServiceMetrics()
+        self.pool = SupervisedPool(workers=self.workers, timeout_sec=timeout_sec, max_rss_mb=max_rss_mb)
+        # Start every worker now so parsers are imported before the first request
+        for future in [self.pool.submit(_warm_up) for _ in range(self.workers)]:
+            future.result()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IMetVi local metadata extraction service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--timeout-sec", type=float, default=DEFAULT_TIMEOUT_SEC, help="Wall-clock limit per file")
+    parser.add_argument("--max-rss-mb", type=int, default=DEFAULT_MAX_RSS_MB, help="Memory limit per worker")
+    parser.add_argument("--verbose", action="store_true", help="Log every HTTP request")
+    args = parser.parse_args()
+
+    service = MetadataService(args.host, args.port, args.workers, args.verbose,
+                              timeout_sec=args.timeout_sec, max_rss_mb=args.max_rss_mb)
+    host, port = service.server_address[:2]
+    print(f"IMetVi metadata service listening on http://{host}:{port} with {service.workers} workers")
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.server_close()
+
+
+if __name__ == "__main__":
+    main()
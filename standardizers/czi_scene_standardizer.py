@@ -0,0 +1,53 @@
+# standardizers/czi_scene_standardizer.py
+
+# File-level entries that do not describe a single scene: computed over the whole
+# file (pixel statistics, fixity) or the scene list itself. Scene records refer to
+# the file record through FileImageName instead of repeating them.
+FILE_LEVEL_ONLY = (
+    "Scenes", "ChannelStatistics", "ChannelStatisticsError", "Checksums", "FileSizeBytes",
+)
+
+
+def standardize_czi_scene_metadata(standardized_metadata, scenes):
+    """
+    Builds one standardized record per scene from the file-level record and the
+    scene extents returned by parse_czi_scenes.
+
+    Acquisition settings (objective, channels, pixel sizes, ...) are shared by
+    all scenes; dimensions and positions are replaced by the scene's own.
+    Entries in FILE_LEVEL_ONLY stay on the file record only.
+    """
+    records = []
+    image_name = standardized_metadata.get("ImageName", "")
+    for scene in scenes:
+        record = {k: v for k, v in standardized_metadata.items() if k not in FILE_LEVEL_ONLY}
+        record["ImageName"] = f"{image_name} [Scene {scene['SceneIndex'] + 1}]"
+        record["FileImageName"] = image_name
+        record["SceneIndex"] = str(scene["SceneIndex"])
+        record["SceneName"] = scene.get("SceneName", "")
+        record["WellName"] = scene.get("WellName", "")
+        record["DimensionX"] = str(scene["DimensionX"])
+        record["DimensionY"] = str(scene["DimensionY"])
+        record["SizeZ"] = str(scene["SizeZ"])
+        record["SizeT"] = str(scene["SizeT"])
+        record["SizeC"] = str(scene["SizeC"])
+        record["SizeM"] = str(scene["SizeM"])
+        record["StartX"] = str(scene["StartX"])
+        record["StartY"] = str(scene["StartY"])
+        record["StageCenterX"] = scene.get("StageCenterX", "")
+        record["StageCenterY"] = scene.get("StageCenterY", "")
+        records.append(record)
+    return records
+
+
+def expand_scene_records(standardized_metadata):
+    """
+    Returns the file record followed by its per-scene records, or [record] if it
+    has none. The file record is returned without its Scenes list, so whole-file
+    entries (statistics, checksums) are listed once.
+    """
+    scenes = standardized_metadata.get("Scenes")
+    if not scenes:
+        return [standardized_metadata]
+    file_record = {k: v for k, v in standardized_metadata.items() if k != "Scenes"}
+    return [file_record] + scenes
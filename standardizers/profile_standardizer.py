@@ -0,0 +1,266 @@
+# standardizers/profile_standardizer.py
+
+import os
+
+from metadata_profiles.microscopy_profiles import STANDARDIZATION_PROFILES
+
+TEXT_PREFIX = "text:"
+CHANNEL_PLACEHOLDER = " #{i}"
+
+# Marks a source that does not occur in the parsed metadata
+_MISSING = object()
+
+_compiled_plans = {}
+
+
+def _basename(value):
+    return os.path.basename(value)
+
+
+def _inverse_rational(value):
+    # TIFF X/YResolution (numerator, denominator) -> pixel size
+    if not isinstance(value, tuple):
+        return None
+    numerator, denominator = value
+    return denominator / numerator if numerator else None
+
+
+def _ns_to_s(value):
+    return float(value) / 1e9
+
+
+CONVERSIONS = {
+    "basename": _basename,
+    "inverse_rational": _inverse_rational,
+    "ns_to_s": _ns_to_s,
+}
+
+FIELD_TYPES = ("str", "nonzero", "count", "raw")
+
+
+def available_applications(file_format=None):
+    """
+    Returns the application names that have a standardization profile.
+    """
+    return sorted({app for app, fmt in STANDARDIZATION_PROFILES if file_format in (None, fmt)})
+
+
+def standardize_metadata(raw_metadata, file_format, application="Microscopy"):
+    """
+    Standardizes parser output using the declarative profile registered for
+    (application, file_format) in metadata_profiles.microscopy_profiles.
+    """
+    return apply_plan(get_standardization_plan(application, file_format), raw_metadata)
+
+
+def get_standardization_plan(application, file_format):
+    """
+    Returns the compiled plan for a profile, compiling it on first use.
+    """
+    key = (application, file_format)
+    plan = _compiled_plans.get(key)
+    if plan is None:
+        profile = STANDARDIZATION_PROFILES.get(key)
+        if profile is None:
+            raise ValueError(f"No standardization profile for {application} / {file_format}")
+        plan = _compiled_plans[key] = compile_profile(profile)
+    return plan
+
+
+def compile_profile(profile):
+    """
+    Compiles a profile into a flat lookup plan.
+
+    Every source path is indexed once as {path: [(slot, rank), ...]}, where the
+    slot is the output field and the rank its position in the field's fallback
+    order. Standardizing then walks the parsed metadata a single time and only
+    touches keys that some field asks for, so the cost does not grow with the
+    number of fallback chains.
+    """
+    fields = []
+    raw_lookup = {}
+    text_lookup = {}
+    default_type = profile.get("default_type", "str")
+
+    for slot, spec in enumerate(profile["fields"]):
+        fields.append(_compile_field(spec, default_type))
+        for rank, source in enumerate(spec.get("sources", [])):
+            lookup, path = (text_lookup, source[len(TEXT_PREFIX):]) if source.startswith(TEXT_PREFIX) else (raw_lookup, source)
+            lookup.setdefault(path, []).append((slot, rank))
+
+    plan = {
+        "fields": fields,
+        "slots": {field["key"]: slot for slot, field in enumerate(fields)},
+        "raw_lookup": raw_lookup,
+        "text_lookup": text_lookup,
+        "text_sources": list(profile.get("text_sources", [])),
+        "channels": None,
+        "channel_text_lookup": {},
+    }
+
+    channels = profile.get("channels")
+    if channels:
+        channel_fields = [_compile_field(spec, default_type) for spec in channels["fields"]]
+        plan["channels"] = dict(channels, fields=channel_fields)
+        if channels["layout"] == "flat":
+            # Indexed text keys are matched by their base path, e.g. "...|ExposureTime"
+            for slot, spec in enumerate(channels["fields"]):
+                for rank, source in enumerate(spec["sources"]):
+                    path = source[len(TEXT_PREFIX):]
+                    if not path.endswith(CHANNEL_PLACEHOLDER):
+                        raise ValueError(f"Channel source must end with '{CHANNEL_PLACEHOLDER}': {source}")
+                    base = path[:-len(CHANNEL_PLACEHOLDER)]
+                    plan["channel_text_lookup"].setdefault(base, []).append((slot, rank))
+
+    return plan
+
+
+def _compile_field(spec, default_type="str"):
+    convert = spec.get("convert")
+    if convert is not None and convert not in CONVERSIONS:
+        raise ValueError(f"Unknown conversion '{convert}' for field {spec['key']}")
+    field_type = spec.get("type", default_type)
+    if field_type not in FIELD_TYPES:
+        raise ValueError(f"Unknown type '{field_type}' for field {spec['key']}")
+    return {
+        "key": spec["key"],
+        "convert": CONVERSIONS.get(convert),
+        "type": field_type,
+        "default": spec.get("default", ""),
+        "derived": spec.get("derived"),
+        "sources": [s[len(TEXT_PREFIX):] if s.startswith(TEXT_PREFIX) else s for s in spec.get("sources", [])],
+    }
+
+
+def apply_plan(plan, raw_metadata):
+    """
+    Runs a compiled plan over parser output and returns the standardized record.
+    """
+    fields = plan["fields"]
+    candidates = [[_MISSING] * len(field["sources"]) for field in fields]
+    channel_candidates = {}
+
+    raw_lookup = plan["raw_lookup"]
+    for key, value in raw_metadata.items():
+        for slot, rank in raw_lookup.get(key, ()):
+            candidates[slot][rank] = value
+
+    # Text keys may repeat across blocks and lines; the last occurrence wins, even if blank
+    text_lookup = plan["text_lookup"]
+    channel_text_lookup = plan["channel_text_lookup"]
+    channel_fields = plan["channels"]["fields"] if plan["channels"] else []
+    for source in plan["text_sources"]:
+        for block in _text_blocks(raw_metadata.get(source)):
+            for line in block.splitlines():
+                if "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                key = key.strip()
+                value = value.strip()
+
+                for slot, rank in text_lookup.get(key, ()):
+                    candidates[slot][rank] = value
+
+                if channel_text_lookup and " #" in key:
+                    base, index = key.rsplit(" #", 1)
+                    hits = channel_text_lookup.get(base)
+                    if hits and index.isdigit():
+                        slot_candidates = channel_candidates.setdefault(
+                            int(index), [[_MISSING] * len(f["sources"]) for f in channel_fields]
+                        )
+                        for slot, rank in hits:
+                            slot_candidates[slot][rank] = value
+
+    report = {}
+    channel_list = _channel_list(plan, raw_metadata)
+    for field, values in zip(fields, candidates):
+        if field["derived"] == "channel_count":
+            report[field["key"]] = str(len(channel_list))
+        elif field["derived"] == "channels":
+            report[field["key"]] = channel_list
+        else:
+            report[field["key"]] = _resolve(field, values)
+
+    channels = plan["channels"]
+    if channels and channels["layout"] == "flat":
+        count = _to_count(report[channels["count_field"]])
+        for i in range(1, count + 1):
+            slot_candidates = channel_candidates.get(i) or [[_MISSING] * len(f["sources"]) for f in channel_fields]
+            entries = {field["key"]: _resolve(field, values) for field, values in zip(channel_fields, slot_candidates)}
+            if entries[channels["required"]] == "":
+                continue
+            for key, value in entries.items():
+                report[f"Channel_{i}_{key}"] = value
+
+    return report
+
+
+def _resolve(field, values):
+    """
+    Picks a field's value from its candidates (in fallback order).
+
+    "raw" fields return the first source present, as stored (None included).
+    Other types skip missing values (None / ""), values whose conversion fails
+    or yields None, and for "nonzero" also zero / empty values.
+    """
+    convert = field["convert"]
+    if field["type"] == "raw":
+        for value in values:
+            if value is not _MISSING:
+                return convert(value) if convert is not None else value
+        return field["default"]
+
+    for value in values:
+        if value is _MISSING or value is None or (isinstance(value, str) and value == ""):
+            continue
+        if convert is not None:
+            try:
+                value = convert(value)
+            except Exception:
+                continue
+            if value is None:
+                continue
+        if field["type"] == "count":
+            count = _to_count(value)
+            return str(count) if count else ""
+        if field["type"] == "nonzero" and not _truthy(value):
+            continue
+        return str(value)
+    return field["default"]
+
+
+def _channel_list(plan, raw_metadata):
+    channels = plan["channels"]
+    if not channels or channels["layout"] != "list":
+        return []
+    entries = []
+    for item in raw_metadata.get(channels["source"]) or []:
+        entry = {}
+        for field in channels["fields"]:
+            value = next((item[s] for s in field["sources"] if s in item), "")
+            entry[field["key"]] = field["convert"](value) if field["convert"] and value != "" else value
+        entries.append(entry)
+    return entries
+
+
+def _text_blocks(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            if isinstance(item, str):
+                yield item
+
+
+def _to_count(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _truthy(value):
+    try:
+        return bool(value)
+    except ValueError:  # numpy arrays
+        return value.size > 0
@@ -0,0 +1,40 @@
+# tests/test_czi_scene_standardizer.py
+
+from standardizers.czi_scene_standardizer import expand_scene_records, standardize_czi_scene_metadata
+
+
+def _scene(index):
+    return {
+        "SceneIndex": index, "SceneName": f"P{index + 1}", "WellName": "A1",
+        "StartX": 100 * index, "StartY": 0, "DimensionX": 100, "DimensionY": 80,
+        "SizeZ": 1, "SizeT": 1, "SizeC": 2, "SizeM": 4, "SubblockCount": 8,
+        "StageCenterX": "", "StageCenterY": "",
+    }
+
+
+def test_scene_records_reference_file_level_entries():
+    file_record = {
+        "ImageName": "plate",
+        "Objective": "Plan-Apochromat 20x",
+        "ChannelStatistics": [{"Channel": 0, "Histogram": [0] * 256}],
+        "Checksums": {"sha256": "0" * 64},
+        "FileSizeBytes": 1234,
+    }
+    file_record["Scenes"] = standardize_czi_scene_metadata(file_record, [_scene(0), _scene(1)])
+
+    for scene in file_record["Scenes"]:
+        assert scene["FileImageName"] == "plate"
+        assert scene["Objective"] == "Plan-Apochromat 20x"
+        for key in ("Scenes", "ChannelStatistics", "Checksums", "FileSizeBytes"):
+            assert key not in scene
+
+    records = expand_scene_records(file_record)
+    assert [r["ImageName"] for r in records] == ["plate", "plate [Scene 1]", "plate [Scene 2]"]
+    assert "Scenes" not in records[0]
+    assert records[0]["Checksums"] == {"sha256": "0" * 64}
+    assert sum("ChannelStatistics" in r for r in records) == 1
+
+
+def test_expand_without_scenes_returns_the_record():
+    record = {"ImageName": "single"}
+    assert expand_scene_records(record) == [record]
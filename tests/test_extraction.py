@@ -0,0 +1,50 @@
+# tests/test_extraction.py
+
+import numpy as np
+import tifffile
+
+from utils import extraction
+from utils.extraction import extract_batch
+from utils.supervised_pool import SupervisedPool
+
+
+def _write_tiffs(directory, count):
+    paths = []
+    for i in range(count):
+        path = str(directory / f"image_{i}.tif")
+        tifffile.imwrite(path, np.full((8, 8), i, dtype=np.uint8))
+        paths.append(path)
+    return paths
+
+
+def test_extract_batch_bounds_submissions(tmp_path):
+    paths = _write_tiffs(tmp_path, 12)
+    consumed = []
+
+    def lazy_paths():
+        for path in paths:
+            consumed.append(path)
+            yield path
+
+    with SupervisedPool(workers=2) as pool:
+        results = extract_batch(lazy_paths(), pool=pool)
+        first = next(results)
+        # Only the submission window is drawn from the iterable before the first result
+        assert len(consumed) <= extraction.SUBMIT_AHEAD_PER_WORKER * pool.workers + 1
+        rest = list(results)
+
+    assert sorted(r["index"] for r in [first] + rest) == list(range(12))
+    assert all(r["status"] == "ok" for r in [first] + rest)
+    assert all(r["path"] == paths[r["index"]] for r in [first] + rest)
+
+
+def test_extract_batch_include_raw_tiff(tmp_path):
+    path = str(tmp_path / "image.tif")
+    tifffile.imwrite(path, np.zeros((16, 16), dtype=np.uint16), compression="zlib",
+                     resolution=(2.0, 2.0), resolutionunit="CENTIMETER")
+
+    results = list(extract_batch([path], include_raw=True, workers=1))
+
+    assert len(results) == 1
+    assert results[0]["status"] == "ok", results[0]
+    assert results[0]["raw_metadata"]["Compression"] == "ADOBE_DEFLATE"
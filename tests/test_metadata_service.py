@@ -0,0 +1,59 @@
+# tests/test_metadata_service.py
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import numpy as np
+import pytest
+import tifffile
+
+from service.metadata_service import MetadataService
+
+
+@pytest.fixture
+def service():
+    server = MetadataService(port=0, workers=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _extract(server, body):
+    host, port = server.server_address[:2]
+    request = urllib.request.Request(
+        f"http://{host}:{port}/extract", data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return [json.loads(line) for line in response.read().decode("utf-8").splitlines() if line]
+
+
+def test_extract_include_raw_tiff(service, tmp_path):
+    path = str(tmp_path / "image.tif")
+    tifffile.imwrite(path, np.zeros((2, 16, 16), dtype=np.uint16), compression="zlib",
+                     photometric="minisblack", resolution=(2.0, 2.0), resolutionunit="CENTIMETER")
+
+    results = _extract(service, {"paths": [path], "include_raw": True, "checksums": ["sha256"]})
+
+    assert len(results) == 1
+    result = results[0]
+    assert result["status"] == "ok", result
+    # tifffile enums (COMPRESSION, PHOTOMETRIC, RESUNIT) come back by name
+    assert result["raw_metadata"]["Compression"] == "ADOBE_DEFLATE"
+    assert result["raw_metadata"]["PhotometricInterpretation"] == "MINISBLACK"
+    assert result["metadata"]["Checksums"]["sha256"]
+
+
+def test_extract_rejects_unknown_checksum(service, tmp_path):
+    host, port = service.server_address[:2]
+    request = urllib.request.Request(
+        f"http://{host}:{port}/extract",
+        data=json.dumps({"paths": [], "checksums": ["shake_128"]}).encode("utf-8")
+    )
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=10)
+    assert error.value.code == 400
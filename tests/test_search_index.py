@@ -0,0 +1,40 @@
+# tests/test_search_index.py
+
+import pickle
+
+import pytest
+
+from utils.cache import CACHE_DIR_ENV
+from utils.search_index import SearchIndex
+
+
+def test_save_and_load_roundtrip(tmp_path):
+    image = tmp_path / "image.tif"
+    image.write_bytes(b"")
+    index = SearchIndex()
+    index.add_file(str(image), {"Model": "Axio Observer", "ImageDescription": "DefiniteFocus = on"})
+    path = str(tmp_path / "index.pickle")
+    index.save(path)
+
+    loaded = SearchIndex.load(path)
+    assert [hit["path"] for hit in loaded.search("definitefoc")] == [str(image)]
+
+
+@pytest.mark.parametrize("content", [
+    b"",
+    b"not a pickle",
+    pickle.dumps(ValueError("foreign object")),
+    pickle.dumps([1, 2, 3]),
+    b"\x80\x04\x95\x10\x00\x00\x00\x00\x00\x00\x00\x8c\x0bno_such_mod\x94\x8c\x01x\x94\x93\x94.",
+])
+def test_load_corrupt_index_returns_empty(tmp_path, content):
+    path = tmp_path / "index.pickle"
+    path.write_bytes(content)
+    assert SearchIndex.load(str(path)).files == []
+
+
+def test_load_with_unusable_cache_dir_returns_empty(tmp_path, monkeypatch):
+    not_a_dir = tmp_path / "file"
+    not_a_dir.write_text("")
+    monkeypatch.setenv(CACHE_DIR_ENV, str(not_a_dir / "cache"))
+    assert SearchIndex.load().files == []
@@ -0,0 +1,28 @@
+# utils/cache.py
+
+import os
+import sys
+
+CACHE_DIR_ENV = "IMETVI_CACHE_DIR"
+
+
+def get_cache_dir():
+    """
+    Returns the per-user cache directory, creating it if needed.
+
+    IMETVI_CACHE_DIR overrides the default (%LOCALAPPDATA%\\IMetVi\\Cache on
+    Windows, $XDG_CACHE_HOME/imetvi or ~/.cache/imetvi elsewhere).
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        if sys.platform == "win32" and os.environ.get("LOCALAPPDATA"):
+            cache_dir = os.path.join(os.environ["LOCALAPPDATA"], "IMetVi", "Cache")
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+            cache_dir = os.path.join(base, "imetvi")
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_cache_path(name):
+    return os.path.join(get_cache_dir(), name)
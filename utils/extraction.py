@@ -0,0 +1,206 @@
+# utils/extraction.py
+
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from metadata_parsers.tiff_parser import parse_tiff_metadata
+from metadata_parsers.czi_parser import parse_czi_metadata
+from metadata_parsers.czi_scene_parser import parse_czi_scenes
+from standardizers.czi_scene_standardizer import standardize_czi_scene_metadata
+from standardizers.profile_standardizer import standardize_metadata
+from utils.fixity import compute_checksums
+from utils.pixel_statistics import compute_channel_statistics, parse_bit_depth
+from utils.serialization import make_json_serializable
+from utils.supervised_pool import SupervisedPool, WorkerLimitExceeded
+
+SUPPORTED_EXTENSIONS = {
+    ".tif": "TIFF",
+    ".tiff": "TIFF",
+    ".czi": "CZI",
+}
+
+# Defaults for isolated batch extraction
+DEFAULT_TIMEOUT_SEC = 120
+DEFAULT_MAX_RSS_MB = 4096
+# Files submitted ahead of the results consumed, per worker
+SUBMIT_AHEAD_PER_WORKER = 2
+
+
+def detect_format(file_path):
+    """
+    Returns "TIFF" or "CZI" based on the file extension, or None if unsupported.
+    """
+    return SUPPORTED_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+
+
+def extract_metadata(file_path, file_format=None, application="Microscopy",
+                     pixel_statistics=False, pixel_statistics_workers=None, checksums=None,
+                     per_scene=False, pixel_statistics_executor=None):
+    """
+    Parses and standardizes a single image file.
+
+    checksums is an optional sequence of hashlib algorithm names; the digests
+    are computed in a background thread while the file is being parsed (and
+    its pixel statistics computed), overlapping both reads.
+
+    Pixel statistics are optional: if they cannot be computed (e.g. a corrupt
+    strip), the record keeps its metadata and gets "ChannelStatisticsError".
+    pixel_statistics_executor is an optional process pool shared across files.
+
+    With per_scene, CZI records get a "Scenes" list holding one standardized
+    record per scene, derived from the subblock directory only.
+
+    Returns:
+        - text_report: The raw metadata report shown in the left panel.
+        - raw_metadata: The dictionary returned by the format parser.
+        - standardized_metadata: The standardized (REMBI-oriented) record.
+    """
+    file_format = file_format or detect_format(file_path)
+    if file_format not in ("TIFF", "CZI"):
+        raise ValueError(f"Unsupported file format: {file_format or os.path.basename(file_path)}")
+
+    cancel_checksums = threading.Event()
+    fixity_executor = ThreadPoolExecutor(max_workers=1)
+    try:
+        checksum_future = fixity_executor.submit(
+            compute_checksums, file_path, tuple(checksums), cancel=cancel_checksums
+        ) if checksums else None
+
+        if file_format == "TIFF":
+            text_report, raw_metadata = parse_tiff_metadata(file_path, application=application, strict=True)
+        else:
+            text_report, raw_metadata = parse_czi_metadata(file_path, application=application)
+        standardized_metadata = standardize_metadata(raw_metadata, file_format, application)
+
+        if pixel_statistics:
+            try:
+                standardized_metadata["ChannelStatistics"] = compute_channel_statistics(
+                    file_path,
+                    file_format=file_format,
+                    bit_depth=parse_bit_depth(standardized_metadata.get("BitDepth")),
+                    max_workers=pixel_statistics_workers,
+                    executor=pixel_statistics_executor
+                )
+            except Exception as e:
+                standardized_metadata["ChannelStatisticsError"] = f"{type(e).__name__}: {e}"
+
+        if checksum_future is not None:
+            digests = checksum_future.result()
+            standardized_metadata["FileSizeBytes"] = digests.pop("size")
+            standardized_metadata["Checksums"] = digests
+    except BaseException:
+        # Report a decode error right away instead of after hashing the rest of a large file
+        cancel_checksums.set()
+        raise
+    finally:
+        fixity_executor.shutdown(wait=False)
+
+    if per_scene and file_format == "CZI":
+        standardized_metadata["Scenes"] = standardize_czi_scene_metadata(
+            standardized_metadata, parse_czi_scenes(file_path)
+        )
+
+    return text_report, raw_metadata, standardized_metadata
+
+
+def extract_result(file_path, file_format=None, application="Microscopy",
+                   pixel_statistics=False, include_raw=False, include_report=False, checksums=None,
+                   per_scene=False):
+    """
+    Extracts one file and returns a JSON-serializable result entry.
+    Never raises: failures are recorded as {"status": "error", "failure": ...}.
+    """
+    started = time.perf_counter()
+    result = {"path": file_path}
+    try:
+        text_report, raw_metadata, standardized_metadata = extract_metadata(
+            file_path,
+            file_format=file_format,
+            application=application,
+            pixel_statistics=pixel_statistics,
+            checksums=checksums,
+            per_scene=per_scene
+        )
+        result["status"] = "ok"
+        result["metadata"] = make_json_serializable(standardized_metadata)
+        if include_raw:
+            result["raw_metadata"] = make_json_serializable(raw_metadata)
+        if include_report:
+            result["text_report"] = text_report
+    except Exception as e:
+        result.update(failure_entry(file_path, e))
+    result["elapsed_sec"] = time.perf_counter() - started
+    return result
+
+
+def failure_entry(file_path, error):
+    """
+    Classifies an extraction error into a structured failure entry.
+    """
+    if isinstance(error, WorkerLimitExceeded):
+        failure = error.failure
+    elif isinstance(error, MemoryError):
+        failure = "oom"
+    elif isinstance(error, OSError):
+        failure = "io_error"
+    elif isinstance(error, ValueError) and str(error).startswith("Unsupported file format"):
+        failure = "unsupported_format"
+    else:
+        failure = "decode_error"
+    return {
+        "path": file_path,
+        "status": "error",
+        "failure": failure,
+        "error": f"{type(error).__name__}: {error}",
+    }
+
+
+def extract_batch(file_paths, file_format=None, application="Microscopy",
+                  pixel_statistics=False, include_raw=False, include_report=False, checksums=None,
+                  per_scene=False, workers=None, timeout_sec=DEFAULT_TIMEOUT_SEC, max_rss_mb=DEFAULT_MAX_RSS_MB,
+                  max_tasks_per_worker=None, pool=None):
+    """
+    Extracts many files in supervised worker processes.
+
+    Each file runs under the wall-clock and RSS limits; a worker that exceeds
+    them is killed and replaced while the rest of the batch keeps going.
+    Yields one result entry per file (see extract_result) in completion order,
+    with its position in file_paths under "index".
+
+    file_paths may be any iterable. Only SUBMIT_AHEAD_PER_WORKER files per
+    worker are in flight at a time and each result is released once yielded,
+    so memory stays flat however long the batch is.
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = SupervisedPool(workers=workers, timeout_sec=timeout_sec, max_rss_mb=max_rss_mb,
+                              max_tasks_per_worker=max_tasks_per_worker)
+    paths = enumerate(file_paths)
+    window = SUBMIT_AHEAD_PER_WORKER * pool.workers
+    futures = {}
+    try:
+        while True:
+            for index, path in paths:
+                futures[pool.submit(extract_result, path, file_format, application,
+                                    pixel_statistics, include_raw, include_report, checksums, per_scene)] = (index, path)
+                if len(futures) >= window:
+                    break
+            if not futures:
+                break
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, path = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = failure_entry(path, e)
+                result["index"] = index
+                yield result
+    finally:
+        # A consumer that stops early leaves nothing queued on a shared pool
+        for future in futures:
+            future.cancel()
+        if own_pool:
+            pool.shutdown(wait=True, cancel_futures=True)
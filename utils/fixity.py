@@ -0,0 +1,117 @@
+# utils/fixity.py
+
+import hashlib
+import os
+import queue
+import threading
+
+DEFAULT_ALGORITHMS = ("sha256", "md5")
+# Fixed-length digests accepted from clients (shake_* need a length for hexdigest)
+SUPPORTED_ALGORITHMS = ("md5", "sha1", "sha256", "sha512")
+# Large sequential reads keep the disk streaming; hashlib releases the GIL while hashing them
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+READ_AHEAD_BUFFERS = 3
+
+
+def compute_checksums(file_path, algorithms=DEFAULT_ALGORITHMS, chunk_size=DEFAULT_CHUNK_SIZE, cancel=None):
+    """
+    Computes fixity digests of a file in a single sequential read pass.
+
+    A reader thread fills a small ring of reusable buffers while the calling
+    thread hashes them, so I/O and hashing overlap. Every algorithm is fed from
+    the same buffers, i.e. the file is read once no matter how many digests.
+
+    cancel is an optional threading.Event; once set, reading stops after the
+    buffers already in flight and None is returned.
+
+    Returns:
+        A dictionary {algorithm: hex digest} plus "size" (bytes read).
+    """
+    hashes = {name: hashlib.new(name) for name in algorithms}
+
+    free_buffers = queue.Queue()
+    filled_buffers = queue.Queue()
+    for _ in range(READ_AHEAD_BUFFERS):
+        free_buffers.put(bytearray(chunk_size))
+
+    def read_file():
+        try:
+            with open(file_path, "rb", buffering=0) as f:
+                while True:
+                    buffer = free_buffers.get()
+                    if cancel is not None and cancel.is_set():
+                        filled_buffers.put((buffer, 0))
+                        return
+                    n = f.readinto(buffer)
+                    filled_buffers.put((buffer, n))
+                    if not n:
+                        return
+        except OSError as e:
+            filled_buffers.put((e, 0))
+
+    reader = threading.Thread(target=read_file, daemon=True)
+    reader.start()
+
+    size = 0
+    while True:
+        buffer, n = filled_buffers.get()
+        if isinstance(buffer, OSError):
+            raise buffer
+        if not n:
+            break
+        if cancel is None or not cancel.is_set():
+            view = memoryview(buffer)[:n]
+            for digest in hashes.values():
+                digest.update(view)
+            view.release()
+            size += n
+        free_buffers.put(buffer)
+    reader.join()
+
+    if cancel is not None and cancel.is_set():
+        return None
+
+    checksums = {name: digest.hexdigest() for name, digest in hashes.items()}
+    checksums["size"] = size
+    return checksums
+
+
+def write_bagit_manifests(file_checksums, output_dir, base_dir=None, path_prefix=""):
+    """
+    Writes one BagIt-style manifest-<algorithm>.txt per algorithm to output_dir.
+
+    file_checksums is an iterable of (file_path, checksums) pairs as returned by
+    compute_checksums. Paths are written relative to base_dir (default: the
+    common parent of all files) with forward slashes, prefixed with path_prefix
+    (e.g. "data/" when the files are the payload of a bag).
+
+    Returns:
+        The list of manifest files written.
+    """
+    # Files listed more than once (e.g. one record per CZI scene) appear once in the manifest
+    unique = {}
+    for path, checksums in file_checksums:
+        if checksums and path not in unique:
+            unique[path] = checksums
+    file_checksums = list(unique.items())
+    if not file_checksums:
+        return []
+    if base_dir is None:
+        base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(p)) for p, _ in file_checksums])
+
+    algorithms = [name for name in file_checksums[0][1] if name != "size"]
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_paths = []
+    for algorithm in algorithms:
+        manifest_path = os.path.join(output_dir, f"manifest-{algorithm}.txt")
+        with open(manifest_path, "w", encoding="utf-8", newline="\n") as f:
+            for file_path, checksums in file_checksums:
+                relative = os.path.relpath(os.path.abspath(file_path), base_dir).replace(os.sep, "/")
+                f.write(f"{checksums[algorithm]}  {_encode_bagit_path(path_prefix + relative)}\n")
+        manifest_paths.append(manifest_path)
+    return manifest_paths
+
+
+def _encode_bagit_path(path):
+    # BagIt (RFC 8493) percent-encodes %, CR and LF in manifest paths
+    return path.replace("%", "%25").replace("\r", "%0D").replace("\n", "%0A")
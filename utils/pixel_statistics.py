@@ -0,0 +1,313 @@
+# utils/pixel_statistics.py
+
+from concurrent.futures import ProcessPoolExecutor
+
+import os
+
+import czifile
+import numpy as np
+import tifffile
+
+# Upper bound on the number of bytes reduced at once from a memory-mapped plane
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+DEFAULT_HISTOGRAM_BINS = 256
+# Histogram range of floating-point images without SMinSampleValue / SMaxSampleValue
+DEFAULT_FLOAT_RANGE = (0.0, 1.0)
+# Below this file size, starting worker processes costs more than the reduction itself
+PARALLEL_MIN_BYTES = 256 * 1024 * 1024
+
+
+def compute_channel_statistics(file_path, file_format=None, bit_depth=None,
+                               bins=DEFAULT_HISTOGRAM_BINS, max_workers=None,
+                               chunk_bytes=DEFAULT_CHUNK_BYTES, executor=None):
+    """
+    Streams over the pixel data of a TIFF or CZI image and computes per-channel
+    min, max, mean, histogram and saturated-pixel fraction.
+
+    The image is never loaded as a whole: TIFF pages are reduced strip by strip
+    or tile by tile (or in row bands of a memory map when the page is stored
+    uncompressed), CZI images one subblock at a time. With max_workers > 1,
+    files of at least PARALLEL_MIN_BYTES have their pages / subblocks
+    distributed over a process pool: executor if given (so a batch can reuse
+    one pool for all its files), otherwise a pool started for this file.
+
+    Returns:
+        A list with one dictionary per channel, ordered by channel index.
+    """
+    if file_format is None:
+        file_format = "CZI" if file_path.lower().endswith(".czi") else "TIFF"
+
+    if file_format == "TIFF":
+        dtype, tasks, worker, value_range = _plan_tiff(file_path)
+    elif file_format == "CZI":
+        dtype, tasks, worker, value_range = _plan_czi(file_path)
+    else:
+        raise ValueError(f"Unsupported format for pixel statistics: {file_format}")
+
+    saturation_value = _saturation_value(dtype, bit_depth)
+    histogram_spec = _histogram_spec(dtype, saturation_value, bins, value_range)
+    options = (histogram_spec, saturation_value, chunk_bytes)
+
+    if max_workers and max_workers > 1 and os.path.getsize(file_path) < PARALLEL_MIN_BYTES:
+        max_workers = None
+    groups = _split_tasks(tasks, max_workers)
+    if max_workers and max_workers > 1 and len(groups) > 1:
+        args = ([file_path] * len(groups), groups, [options] * len(groups))
+        if executor is not None:
+            partials = list(executor.map(worker, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                partials = list(pool.map(worker, *args))
+    else:
+        partials = [worker(file_path, group, options) for group in groups]
+
+    merged = {}
+    for partial in partials:
+        for channel, acc in partial.items():
+            if channel in merged:
+                _merge_accumulators(merged[channel], acc)
+            else:
+                merged[channel] = acc
+
+    return [_summarize(channel, merged[channel], histogram_spec, saturation_value)
+            for channel in sorted(merged)]
+
+
+def parse_bit_depth(value):
+    """
+    Returns the bit depth stored in a standardized record as an int, or None.
+    Per-sample tuples such as "(8, 8, 8)" yield their first entry.
+    """
+    if isinstance(value, (tuple, list)):
+        value = value[0] if value else ""
+    text = str(value).strip("()[] ").split(",")[0].strip()
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+# === Planning ===
+def _plan_tiff(file_path):
+    with tifffile.TiffFile(file_path) as tif:
+        series = tif.series[0]
+        keyframe = series.keyframe
+        dtype = np.dtype(keyframe.dtype)
+
+        # Leading (non-plane) axes tell which channel each page belongs to
+        leading_axes = series.axes[:len(series.axes) - len(keyframe.axes)]
+        leading_shape = series.shape[:len(leading_axes)]
+        n_pages = len(series.pages)
+
+        tasks = []
+        for page_number in range(n_pages):
+            channel = 0
+            if "C" in leading_axes and int(np.prod(leading_shape)) == n_pages:
+                position = np.unravel_index(page_number, leading_shape)
+                channel = int(position[leading_axes.index("C")])
+            tasks.append((page_number, channel))
+
+        value_range = None
+        if dtype.kind == "f":
+            value_range = _sample_value_range(keyframe)
+
+    return dtype, tasks, _tiff_partial_statistics, value_range
+
+
+def _sample_value_range(page):
+    # SMinSampleValue / SMaxSampleValue hold one value per sample or a single value
+    values = []
+    for name in ("SMinSampleValue", "SMaxSampleValue"):
+        tag = page.tags.get(name)
+        if tag is None:
+            return None
+        value = tag.value
+        values.append(float(min(value) if name == "SMinSampleValue" else max(value))
+                      if isinstance(value, (tuple, list)) else float(value))
+    low, high = values
+    return (low, high) if np.isfinite(low) and np.isfinite(high) and high > low else None
+
+
+def _plan_czi(file_path):
+    with czifile.CziFile(file_path) as czi:
+        dtype = np.dtype(czi.dtype)
+        c_start = czi.start[czi.axes.index("C")] if "C" in czi.axes else 0
+
+        tasks = []
+        for entry_number, entry in enumerate(czi.filtered_subblock_directory):
+            # Pyramid subblocks are downscaled copies of full-resolution data
+            if tuple(entry.stored_shape) != tuple(entry.shape):
+                continue
+            channel = entry.start[entry.axes.index("C")] - c_start if "C" in entry.axes else 0
+            tasks.append((entry_number, int(channel)))
+
+    return dtype, tasks, _czi_partial_statistics, None
+
+
+def _split_tasks(tasks, max_workers):
+    """Splits the task list into contiguous groups so each worker reads sequentially."""
+    if not tasks:
+        return []
+    n_groups = min(len(tasks), max_workers * 4) if max_workers and max_workers > 1 else 1
+    size = -(-len(tasks) // n_groups)
+    return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+
+def _saturation_value(dtype, bit_depth):
+    if dtype.kind not in "ui":
+        return None
+    dtype_max = int(np.iinfo(dtype).max)
+    if bit_depth and dtype.kind == "u" and 0 < bit_depth < dtype.itemsize * 8:
+        return (1 << bit_depth) - 1
+    return dtype_max
+
+
+def _histogram_spec(dtype, saturation_value, bins, value_range=None):
+    """
+    Returns (low, high, bins, shift).
+
+    Integer data spans the dtype up to the saturation value; when that range is
+    a power of two divisible by bins the histogram is computed with a bit shift
+    and np.bincount instead of np.histogram. Floating-point data uses
+    value_range (from the TIFF sample value tags) or DEFAULT_FLOAT_RANGE, and
+    values outside it land in the first / last bin.
+    """
+    if dtype.kind == "f":
+        low, high = value_range or DEFAULT_FLOAT_RANGE
+        return float(low), float(high), bins, None
+    if saturation_value is None:
+        return None
+    low = int(np.iinfo(dtype).min)
+    high = saturation_value + 1
+    span = high - low
+    bins = min(bins, span)
+    shift = None
+    if (low == 0 and dtype.itemsize < 8
+            and span & (span - 1) == 0 and bins & (bins - 1) == 0):
+        shift = span.bit_length() - bins.bit_length()
+    return low, high, bins, shift
+
+
+# === Workers (module level so they can be pickled to a process pool) ===
+def _tiff_partial_statistics(file_path, tasks, options):
+    histogram_spec, saturation_value, chunk_bytes = options
+    accumulators = {}
+
+    with tifffile.TiffFile(file_path) as tif:
+        pages = tif.series[0].pages
+        for page_number, channel in tasks:
+            page = pages[page_number]
+            if isinstance(page, tifffile.TiffFrame):
+                # Frames only carry offsets; workers starting mid-series need the full page tags
+                page = page.aspage()
+            samples = page.samplesperpixel
+
+            # Volumetric pages (ImageDepth > 1) go through segments, which cover every slice
+            if page.is_memmappable and page.planarconfig == 1 and page.imagedepth == 1:
+                data = np.memmap(
+                    file_path, mode="r", offset=page.dataoffsets[0],
+                    dtype=np.dtype(page.dtype).newbyteorder(tif.byteorder),
+                    shape=(page.imagelength, page.imagewidth, samples)
+                )
+                rows = max(1, chunk_bytes // max(1, data[0].nbytes))
+                for row in range(0, page.imagelength, rows):
+                    band = data[row:row + rows]
+                    for s in range(samples):
+                        _update_accumulator(accumulators, channel * samples + s,
+                                            band[..., s], histogram_spec, saturation_value)
+                del data
+                continue
+
+            for segment, indices, _ in page.segments():
+                if segment is None:
+                    continue
+                # Edge tiles are padded to the full tile size
+                z, y, x = indices[1], indices[2], indices[3]
+                segment = segment[:page.imagedepth - z, :page.imagelength - y, :page.imagewidth - x, :]
+                for s in range(segment.shape[-1]):
+                    sample = indices[0] + s
+                    _update_accumulator(accumulators, channel * samples + sample,
+                                        segment[..., s], histogram_spec, saturation_value)
+
+    return accumulators
+
+
+def _czi_partial_statistics(file_path, tasks, options):
+    histogram_spec, saturation_value, _ = options
+    accumulators = {}
+
+    with czifile.CziFile(file_path) as czi:
+        directory = czi.filtered_subblock_directory
+        for entry_number, channel in tasks:
+            entry = directory[entry_number]
+            data = entry.data_segment().data()
+            samples = data.shape[-1] if entry.axes.endswith("0") else 1
+            data = data.reshape(-1, samples)
+            for s in range(samples):
+                _update_accumulator(accumulators, channel * samples + s,
+                                    data[:, s], histogram_spec, saturation_value)
+
+    return accumulators
+
+
+# === Accumulation ===
+def _update_accumulator(accumulators, channel, data, histogram_spec, saturation_value):
+    if data.size == 0:
+        return
+    acc = accumulators.get(channel)
+    if acc is None:
+        acc = accumulators[channel] = {
+            "min": None, "max": None, "sum": 0, "count": 0, "saturated": 0,
+            "histogram": np.zeros(histogram_spec[2], dtype=np.int64) if histogram_spec else None,
+        }
+
+    data_min = data.min()
+    data_max = data.max()
+    acc["min"] = data_min if acc["min"] is None else min(acc["min"], data_min)
+    acc["max"] = data_max if acc["max"] is None else max(acc["max"], data_max)
+    acc["sum"] += data.sum(dtype=np.float64 if data.dtype.kind == "f" else np.int64)
+    acc["count"] += data.size
+
+    if saturation_value is not None:
+        acc["saturated"] += int(np.count_nonzero(data >= saturation_value))
+
+    if histogram_spec is not None:
+        low, high, bins, shift = histogram_spec
+        if shift is not None:
+            counts = np.bincount((data >> shift).ravel(), minlength=bins)
+            if counts.size > bins:
+                # Values above the nominal bit depth land in the last bin
+                counts[bins - 1] += counts[bins:].sum()
+                counts = counts[:bins]
+        elif data.dtype.kind == "f":
+            # NaNs are not counted; the range is closed so the maximum lands in the last bin
+            data = data[~np.isnan(data)]
+            counts, _ = np.histogram(np.clip(data, low, high), bins=bins, range=(low, high))
+        else:
+            counts, _ = np.histogram(np.clip(data, low, high - 1), bins=bins, range=(low, high))
+        acc["histogram"] += counts
+
+
+def _merge_accumulators(target, other):
+    target["min"] = min(target["min"], other["min"])
+    target["max"] = max(target["max"], other["max"])
+    target["sum"] += other["sum"]
+    target["count"] += other["count"]
+    target["saturated"] += other["saturated"]
+    if target["histogram"] is not None:
+        target["histogram"] += other["histogram"]
+
+
+def _summarize(channel, acc, histogram_spec, saturation_value):
+    count = acc["count"]
+    return {
+        "Channel": channel,
+        "Min": acc["min"].item(),
+        "Max": acc["max"].item(),
+        "Mean": float(acc["sum"]) / count if count else None,
+        "PixelCount": int(count),
+        "SaturationValue": saturation_value,
+        "SaturatedFraction": acc["saturated"] / count if count and saturation_value is not None else None,
+        "HistogramRange": [histogram_spec[0], histogram_spec[1]] if histogram_spec else None,
+        "Histogram": acc["histogram"].tolist() if acc["histogram"] is not None else None,
+    }
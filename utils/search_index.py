@@ -0,0 +1,305 @@
+# utils/search_index.py
+
+import bisect
+import os
+import pickle
+import re
+import xml.etree.ElementTree as ET
+from array import array
+
+import numpy as np
+
+from utils.cache import get_cache_path
+
+INDEX_VERSION = 1
+INDEX_FILE = "search_index.pickle"
+# Long numbers (e.g. "1.3749999765839") are noise for search and dominate index size
+MAX_NUMBER_TOKEN_LENGTH = 8
+# Single letters would expand to a large part of the vocabulary
+MIN_PREFIX_LENGTH = 2
+MAX_PREFIX_EXPANSIONS = 256
+# Rewrite postings without removed files once they make up this share of the index
+COMPACT_RATIO = 0.25
+
+_WORD_RE = re.compile(r"[A-Za-z0-9]+(?:\.[0-9]+)?")
+_PART_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+(?:\.[0-9]+)?")
+
+
+def tokenize(text):
+    """
+    Splits text into lowercase search tokens. CamelCase words yield both their
+    parts and the whole word ("DefiniteFocus" -> definite, focus, definitefocus).
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        parts = _PART_RE.findall(word)
+        for token in parts if len(parts) > 1 else ():
+            tokens.append(token.lower())
+        tokens.append(word.lower())
+    return [t for t in tokens if not (t[0].isdigit() and len(t) > MAX_NUMBER_TOKEN_LENGTH)]
+
+
+def iter_metadata_entries(raw_metadata):
+    """
+    Yields (key path, value text) pairs for everything searchable in parser
+    output: the CZI XML tree, Zeiss "key = value" text blocks (TIFF
+    ImageDescription / IJMetadata Info) and plain TIFF tags.
+    """
+    for key, value in raw_metadata.items():
+        if key.startswith("IJMetadata|"):
+            # Flattened copies of the IJMetadata entries handled below
+            continue
+        if key == "MetadataXML" and value:
+            yield from _iter_xml_entries(value)
+        elif key in ("ImageDescription", "IJMetadata"):
+            blocks = value.values() if isinstance(value, dict) else [value]
+            for block in blocks:
+                if isinstance(block, str):
+                    yield from _iter_text_entries(key, block)
+        elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            yield key, str(value)
+
+
+def _iter_xml_entries(metadata_xml):
+    root = ET.fromstring(metadata_xml)
+    stack = [(root, root.tag)]
+    while stack:
+        node, path = stack.pop()
+        for name, value in node.attrib.items():
+            yield f"{path}@{name}", value
+        if node.text and node.text.strip():
+            yield path, node.text.strip()
+        for child in node:
+            stack.append((child, f"{path}/{child.tag}"))
+
+
+def _iter_text_entries(source, block):
+    for line in block.splitlines():
+        if "=" in line:
+            key, value = line.split("=", 1)
+            yield key.strip(), value.strip()
+        elif line.strip():
+            yield source, line.strip()
+
+
+class SearchIndex:
+    """
+    Incremental inverted index over the raw metadata of loaded files.
+
+    Two kinds of postings are kept:
+      - value tokens -> packed (file id, key path id) pairs, so a hit can name
+        the key paths it was found under;
+      - key path name tokens -> key path ids. Files are linked to key paths
+        through shared key path sets, because files from the same instrument
+        have the same XML structure and would otherwise repeat it per file.
+
+    Files are added as they are parsed; a file whose size and modification time
+    are unchanged is not re-indexed. Queries only touch postings, never raw
+    metadata, and the last query word is matched as a prefix.
+    """
+
+    def __init__(self):
+        self.files = []               # file id -> path (None when removed)
+        self.file_ids = {}            # path -> (file id, signature)
+        self.key_paths = []           # key path id -> key path
+        self.key_path_ids = {}
+        self.key_path_tokens = {}     # token -> set of key path ids
+        self.key_path_sets = []       # key path set id -> frozenset of key path ids
+        self.key_path_set_ids = {}
+        self.key_path_set_files = []  # key path set id -> array of file ids
+        self.key_path_sets_by_key_path = {}  # key path id -> set of key path set ids
+        self.file_key_path_set = []   # file id -> key path set id
+        self.postings = {}            # token -> array('Q') of file id << 32 | key path id
+        self.removed = 0
+        self._vocabulary = None
+
+    # === Building ===
+    def is_current(self, file_path, signature=None):
+        entry = self.file_ids.get(file_path)
+        return entry is not None and entry[1] == (signature or file_signature(file_path))
+
+    def add_file(self, file_path, raw_metadata, signature=None):
+        """
+        Indexes the raw metadata of one file, replacing any older version.
+        Returns False if the file was already indexed with the same signature.
+        """
+        signature = signature or file_signature(file_path)
+        if self.is_current(file_path, signature):
+            return False
+        self.remove_file(file_path)
+
+        file_id = len(self.files)
+        self.files.append(file_path)
+        self.file_ids[file_path] = (file_id, signature)
+
+        key_path_ids = set()
+        pairs = {}
+        for key_path, value in iter_metadata_entries(raw_metadata):
+            kp_id = self._key_path_id(key_path)
+            key_path_ids.add(kp_id)
+            for token in tokenize(value):
+                pairs.setdefault(token, set()).add(file_id << 32 | kp_id)
+
+        for token, packed in pairs.items():
+            self.postings.setdefault(token, array("Q")).extend(sorted(packed))
+
+        key_path_set = frozenset(key_path_ids)
+        set_id = self.key_path_set_ids.get(key_path_set)
+        if set_id is None:
+            set_id = self.key_path_set_ids[key_path_set] = len(self.key_path_sets)
+            self.key_path_sets.append(key_path_set)
+            self.key_path_set_files.append(array("I"))
+            for kp_id in key_path_set:
+                self.key_path_sets_by_key_path.setdefault(kp_id, set()).add(set_id)
+        self.key_path_set_files[set_id].append(file_id)
+        self.file_key_path_set.append(set_id)
+
+        self._vocabulary = None
+        return True
+
+    def remove_file(self, file_path):
+        # Postings are cleaned lazily on save; the file id just stops matching
+        entry = self.file_ids.pop(file_path, None)
+        if entry is not None:
+            self.files[entry[0]] = None
+            self.removed += 1
+
+    def _key_path_id(self, key_path):
+        kp_id = self.key_path_ids.get(key_path)
+        if kp_id is None:
+            kp_id = self.key_path_ids[key_path] = len(self.key_paths)
+            self.key_paths.append(key_path)
+            for token in set(tokenize(key_path)):
+                self.key_path_tokens.setdefault(token, set()).add(kp_id)
+        return kp_id
+
+    # === Searching ===
+    def search(self, query, limit=100):
+        """
+        Returns up to limit matches as [{"path": ..., "key_paths": [...]}, ...].
+
+        Every query word must match the file (in a value or a key path name);
+        the last word is treated as a prefix unless the query ends with a space.
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+        prefix_last = not query[-1:].isspace() and len(words[-1]) >= MIN_PREFIX_LENGTH
+
+        terms = []
+        for i, word in enumerate(words):
+            tokens = self._expand_prefix(word) if prefix_last and i == len(words) - 1 else [word]
+            terms.append(self._term(tokens))
+
+        files = None
+        for postings, key_path_matches, set_ids in terms:
+            term_files = np.unique(np.concatenate([np.frombuffer(p, dtype=np.uint64) >> 32 for p in postings]
+                                                  + [np.empty(0, dtype=np.uint64)]))
+            linked = [self.key_path_set_files[set_id] for set_id in set_ids]
+            if linked:
+                term_files = np.union1d(term_files, np.concatenate([np.frombuffer(f, dtype=np.uint32) for f in linked]))
+            files = term_files if files is None else np.intersect1d(files, term_files, assume_unique=True)
+            if not files.size:
+                return []
+
+        file_ids = [int(f) for f in files if self.files[int(f)] is not None][:limit]
+
+        # Key paths are only resolved for the files that are returned
+        selected = np.array(file_ids, dtype=np.uint64)
+        hit_key_paths = {file_id: set() for file_id in file_ids}
+        for postings, key_path_matches, _ in terms:
+            for packed_pairs in postings:
+                pairs = np.frombuffer(packed_pairs, dtype=np.uint64)
+                pairs = pairs[np.isin(pairs >> 32, selected)]
+                for file_id, kp_id in zip((pairs >> 32).tolist(), (pairs & 0xFFFFFFFF).tolist()):
+                    hit_key_paths[file_id].add(kp_id)
+            if key_path_matches:
+                for file_id in file_ids:
+                    hit_key_paths[file_id].update(key_path_matches & self.key_path_sets[self.file_key_path_set[file_id]])
+
+        return [
+            {"path": self.files[file_id], "key_paths": sorted(self.key_paths[kp] for kp in hit_key_paths[file_id])}
+            for file_id in file_ids
+        ]
+
+    def _term(self, tokens):
+        postings = [self.postings[token] for token in tokens if token in self.postings]
+        key_path_matches = set()
+        for token in tokens:
+            key_path_matches.update(self.key_path_tokens.get(token, ()))
+        set_ids = set()
+        for kp_id in key_path_matches:
+            set_ids.update(self.key_path_sets_by_key_path.get(kp_id, ()))
+        return postings, key_path_matches, set_ids
+
+    def _expand_prefix(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(set(self.postings) | set(self.key_path_tokens))
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        tokens = []
+        for token in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not token.startswith(prefix):
+                break
+            tokens.append(token)
+        return tokens
+
+    # === Persistence ===
+    def save(self, path=None):
+        path = path or get_cache_path(INDEX_FILE)
+        if self.files and self.removed / len(self.files) > COMPACT_RATIO:
+            self._compact()
+        state = {key: value for key, value in self.__dict__.items() if key != "_vocabulary"}
+        state["version"] = INDEX_VERSION
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Loads a saved index, or returns an empty one if there is none, it cannot
+        be read (unusable cache directory, corrupt or foreign pickle) or it is
+        from an incompatible version. Never raises: search must not keep the
+        viewer from opening.
+        """
+        index = cls()
+        try:
+            path = path or get_cache_path(INDEX_FILE)
+            with open(path, "rb") as f:
+                state = pickle.load(f)
+        except Exception:
+            return index
+        if not isinstance(state, dict) or state.pop("version", None) != INDEX_VERSION:
+            return index
+        index.__dict__.update(state)
+        return index
+
+    def _compact(self):
+        remap = {}
+        files = []
+        for old_id, path in enumerate(self.files):
+            if path is not None:
+                remap[old_id] = len(files)
+                files.append(path)
+
+        postings = {}
+        for token, packed_pairs in self.postings.items():
+            kept = array("Q", (remap[p >> 32] << 32 | (p & 0xFFFFFFFF) for p in packed_pairs if (p >> 32) in remap))
+            if kept:
+                postings[token] = kept
+
+        self.key_path_set_files = [
+            array("I", (remap[f] for f in file_ids if f in remap)) for file_ids in self.key_path_set_files
+        ]
+        self.file_key_path_set = [self.file_key_path_set[old_id] for old_id in sorted(remap)]
+        self.file_ids = {path: (remap[file_id], signature) for path, (file_id, signature) in self.file_ids.items()}
+        self.files = files
+        self.postings = postings
+        self.removed = 0
+        self._vocabulary = None
+
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
@@ -1,11 +1,14 @@
 # utils/serialization.py
 
+import enum
+
 import numpy as np
 
 def make_json_serializable(obj):
     """
     Recursively convert metadata to JSON-serializable types.
-    Handles numpy arrays, numpy scalar types, bytes, sets, and unsupported objects.
+    Handles numpy arrays, numpy scalar types, numpy dtypes, enums (e.g. tifffile
+    COMPRESSION), bytes, sets, and unsupported objects.
     """
     if isinstance(obj, dict):
         return {k: make_json_serializable(v) for k, v in obj.items()}
@@ -20,9 +23,13 @@ def make_json_serializable(obj):
             return obj.decode('utf-8', errors='replace')
         except Exception:
             return str(obj)
-    elif isinstance(obj, (complex,)):
+    elif isinstance(obj, (complex, np.dtype)):
         return str(obj)
-    elif hasattr(obj, '__dict__'):
+    elif isinstance(obj, enum.Enum):
+        return obj.name
+    elif isinstance(obj, type):
+        return obj.__name__
+    elif isinstance(getattr(obj, '__dict__', None), dict):
         return make_json_serializable(obj.__dict__)
     else:
         return obj
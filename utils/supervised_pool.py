@@ -0,0 +1,278 @@
+# utils/supervised_pool.py
+
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, /proc is used on Linux without it
+    psutil = None
+
+DEFAULT_POLL_INTERVAL_SEC = 0.1
+
+
+class WorkerLimitExceeded(Exception):
+    """
+    Raised from a task future when its worker process had to be killed or died.
+
+    failure is one of "timeout", "oom" or "crashed".
+    """
+
+    def __init__(self, failure, message):
+        super().__init__(message)
+        self.failure = failure
+
+
+def get_rss_bytes(pid):
+    """
+    Returns the resident set size of a process in bytes, or None if unknown.
+    """
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _worker_loop(conn):
+    """
+    Runs in the worker process: executes (task_id, fn, args) messages until None.
+    """
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        task_id, fn, args = message
+        try:
+            conn.send((task_id, True, fn(*args)))
+        except BaseException as e:
+            try:
+                conn.send((task_id, False, e))
+            except Exception:
+                # The exception itself could not be pickled
+                conn.send((task_id, False, RuntimeError(f"{type(e).__name__}: {e}\n{traceback.format_exc()}")))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_loop, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.started = None
+        self.completed = 0
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SupervisedPool:
+    """
+    Process pool where every task runs under a wall-clock and RSS limit.
+
+    Unlike ProcessPoolExecutor, a worker that exceeds a limit is killed and
+    replaced on its own: only the offending task fails (with WorkerLimitExceeded),
+    all other queued and running tasks continue. Workers can also be recycled
+    after a fixed number of tasks to bound slow leaks in the decoders.
+    """
+
+    def __init__(self, workers=None, timeout_sec=None, max_rss_mb=None,
+                 max_tasks_per_worker=None, poll_interval=DEFAULT_POLL_INTERVAL_SEC):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout_sec = timeout_sec
+        self.max_rss_bytes = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.poll_interval = poll_interval
+        self.recycled = 0
+
+        self._context = multiprocessing.get_context()
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._shutdown = False
+        self._wakeup = threading.Event()
+        self._workers = [_Worker(self._context) for _ in range(self.workers)]
+        self._thread = threading.Thread(target=self._supervise, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot submit after shutdown")
+            self._pending.append((self._next_id, fn, args, future))
+            self._next_id += 1
+        self._wakeup.set()
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[3].cancel()
+        self._wakeup.set()
+        if wait:
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown(wait=True)
+
+    # === Supervisor thread ===
+    def _supervise(self):
+        try:
+            self._supervise_loop()
+        finally:
+            # Nothing is outstanding after a normal shutdown; after an unexpected
+            # BaseException, fail whatever is left instead of leaving it hanging
+            self._abandon("supervisor thread exited")
+            for worker in self._workers:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.kill()
+
+    def _supervise_loop(self):
+        while True:
+            with self._lock:
+                finished = self._shutdown and not self._pending
+            if finished and all(w.task is None for w in self._workers):
+                break
+            try:
+                self._supervise_step()
+            except Exception:
+                # A bug in bookkeeping must not stop supervision of the other tasks
+                traceback.print_exc()
+                time.sleep(self.poll_interval)
+
+    def _supervise_step(self):
+        self._dispatch()
+        busy = [w for w in self._workers if w.task is not None]
+        if busy:
+            ready = wait([w.conn for w in busy] + [w.process.sentinel for w in busy],
+                         timeout=self.poll_interval)
+        else:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            ready = []
+
+        for worker in busy:
+            if worker.conn in ready:
+                self._collect(worker)
+            elif worker.process.sentinel in ready:
+                self._crashed(worker)
+            else:
+                self._check_limits(worker)
+
+    def _dispatch(self):
+        for index in range(len(self._workers)):
+            worker = self._workers[index]
+            if worker.task is not None:
+                continue
+            with self._lock:
+                if not self._pending:
+                    return
+                task = self._pending.popleft()
+            task_id, fn, args, future = task
+            # Requeued tasks are already running
+            if not (future.running() or future.set_running_or_notify_cancel()):
+                continue
+
+            if not worker.process.is_alive():
+                # An idle worker died (e.g. killed from outside); start a fresh one first
+                self._replace(worker)
+                worker = self._workers[index]
+            try:
+                worker.conn.send((task_id, fn, args))
+            except OSError:
+                # Broken pipe to a dead worker: replace it and run the task on the next pass
+                self._replace(worker)
+                with self._lock:
+                    self._pending.appendleft(task)
+                continue
+            except Exception as e:
+                # The task itself could not be pickled; nothing was written to the pipe
+                future.set_exception(e)
+                continue
+            worker.task = (task_id, future)
+            worker.started = time.monotonic()
+
+    def _collect(self, worker):
+        try:
+            _, ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            self._crashed(worker)
+            return
+        except Exception as e:
+            # The whole message was read but could not be unpickled (e.g. an exception
+            # type with a custom constructor); the worker itself is fine
+            ok, value = False, RuntimeError(f"task result could not be unpickled: {type(e).__name__}: {e}")
+        future = worker.task[1]
+        worker.task = None
+        worker.completed += 1
+        if ok:
+            future.set_result(value)
+        else:
+            future.set_exception(value)
+        if self.max_tasks_per_worker and worker.completed >= self.max_tasks_per_worker:
+            self._replace(worker)
+
+    def _check_limits(self, worker):
+        elapsed = time.monotonic() - worker.started
+        if self.timeout_sec and elapsed > self.timeout_sec:
+            self._fail(worker, "timeout", f"exceeded wall-clock limit of {self.timeout_sec} s")
+            return
+        if self.max_rss_bytes:
+            rss = get_rss_bytes(worker.process.pid)
+            if rss is not None and rss > self.max_rss_bytes:
+                self._fail(worker, "oom", f"exceeded memory limit of {self.max_rss_bytes // (1024 * 1024)} MB "
+                                          f"(RSS {rss // (1024 * 1024)} MB)")
+
+    def _crashed(self, worker):
+        worker.process.join(timeout=1)
+        self._fail(worker, "crashed", f"worker exited with code {worker.process.exitcode}")
+
+    def _fail(self, worker, failure, message):
+        future = worker.task[1]
+        worker.task = None
+        self._replace(worker)
+        future.set_exception(WorkerLimitExceeded(failure, message))
+
+    def _abandon(self, reason):
+        with self._lock:
+            pending, self._pending = list(self._pending), deque()
+        for _, _, _, future in pending:
+            if future.running() or future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(reason))
+        for worker in self._workers:
+            if worker.task is not None and not worker.task[1].done():
+                worker.task[1].set_exception(RuntimeError(reason))
+            worker.task = None
+
+    def _replace(self, worker):
+        worker.kill()
+        self._workers[self._workers.index(worker)] = _Worker(self._context)
+        self.recycled += 1